@@ -0,0 +1,62 @@
+# Настройки gunicorn для yatube: gunicorn -c gunicorn.conf.py yatube.wsgi
+#
+# Django 2.2 не умеет ASGI и async-view, поэтому медленные запросы к базе
+# и диску разносятся по потокам: воркер gthread держит THREADS запросов
+# одновременно, а ожидание ввода-вывода отпускает GIL. На страницах из
+# кэша, где всё упирается в процессор, sync-воркер быстрее, но перед
+# контейнером нет буферизующего прокси, и один медленный клиент занимает
+# sync-воркер целиком, а у gthread — только свой поток.
+import multiprocessing
+import os
+import shutil
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'gthread'
+# Кэш в памяти процесса у каждого воркера свой, и поколения страниц,
+# ETag и список знаменитостей в них расходятся. Несколько воркеров —
+# только с общим memcached (MEMCACHED_LOCATION).
+if os.environ.get('MEMCACHED_LOCATION'):
+    workers = int(os.environ.get(
+        'WEB_CONCURRENCY', multiprocessing.cpu_count() + 1))
+else:
+    workers = 1
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+# Медленные клиенты не занимают поток: соединение keep-alive ждёт
+# в цикле событий воркера, а не в обработчике
+keepalive = 5
+timeout = 30
+graceful_timeout = 30
+# Перезапуск воркеров ограничивает рост памяти от утечек в библиотеках
+max_requests = 2000
+max_requests_jitter = 200
+accesslog = '-'
+
+
+def on_starting(server):
+    from django.conf import settings
+    from django.core.cache.backends.locmem import LocMemCache
+    from django.utils.module_loading import import_string
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    backend = import_string(settings.CACHES['default']['BACKEND'])
+    if server.cfg.workers > 1 and issubclass(backend, LocMemCache):
+        raise RuntimeError(
+            'Кэш в памяти процесса не делится между воркерами: '
+            'задайте MEMCACHED_LOCATION или запустите один воркер')
+    # Снимки метрик прошлого запуска не должны попасть в новые счётчики.
+    shutil.rmtree(settings.METRICS_DIR, ignore_errors=True)
+
+
+def worker_exit(server, worker):
+    # Запросы после последнего сброса снимка иначе потеряются.
+    from monitoring import metrics
+
+    metrics.store.flush(force=True)
+
+
+def child_exit(server, worker):
+    # Итоги воркера, завершённого по max_requests или упавшего, уходят
+    # в архив, а его файл удаляется: каталог не растёт от перезапусков.
+    from monitoring import metrics
+
+    metrics.archive(worker.pid)
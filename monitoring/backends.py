@@ -0,0 +1,44 @@
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+from sorl.thumbnail.base import ThumbnailBackend
+
+from .metrics import THUMBNAIL_SECONDS
+from .timing import measure
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        # Вложенные include рендерятся внутри и отдельно не считаются.
+        with measure('tpl'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, который замеряет время рендера страниц."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class TimedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который замеряет подготовку миниатюр.
+
+    В Server-Timing идёт всё время get_thumbnail, включая поиск готовой
+    миниатюры, а в метрики — только создание новых.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        with measure('thumb'):
+            return super().get_thumbnail(file_, geometry_string, **options)
+
+    def _create_thumbnail(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super()._create_thumbnail(*args, **kwargs)
+        finally:
+            THUMBNAIL_SECONDS.observe(time.perf_counter() - started)
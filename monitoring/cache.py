@@ -0,0 +1,46 @@
+from django.core.cache.backends import locmem, memcached
+
+from .metrics import CACHE_REQUESTS
+
+MISSING = object()
+
+
+class CountingCacheMixin:
+    """Считает попадания и промахи чтений для метрик.
+
+    get_many базового класса читает ключи через get, так что
+    отдельно его считать нужно только у memcached.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version)
+        if value is MISSING:
+            CACHE_REQUESTS.inc(result='miss')
+            return default
+        CACHE_REQUESTS.inc(result='hit')
+        return value
+
+
+class CountingMemcachedMixin(CountingCacheMixin):
+    """Memcached читает пачку ключей одним запросом, минуя get."""
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        if found:
+            CACHE_REQUESTS.inc(len(found), result='hit')
+        if len(keys) > len(found):
+            CACHE_REQUESTS.inc(len(keys) - len(found), result='miss')
+        return found
+
+
+class LocMemCache(CountingCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class MemcachedCache(CountingMemcachedMixin, memcached.MemcachedCache):
+    pass
+
+
+class PyLibMCCache(CountingMemcachedMixin, memcached.PyLibMCCache):
+    pass
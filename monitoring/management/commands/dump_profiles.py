@@ -0,0 +1,34 @@
+import os
+import shutil
+
+from django.core.management.base import BaseCommand
+
+from monitoring import profiling
+
+
+class Command(BaseCommand):
+    help = ('Выгружает накопленные стеки в формате collapsed stacks '
+            'для flamegraph.pl или speedscope')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view', action='append',
+            help='только указанные view, например index или api:index')
+        parser.add_argument('--output', help='файл вместо stdout')
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='удалить накопленные стеки после выгрузки')
+
+    def handle(self, *args, **options):
+        stacks = profiling.load(options['view'])
+        lines = ''.join(
+            f'{stack} {count}\n' for stack, count in sorted(stacks.items()))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(lines)
+        else:
+            self.stdout.write(lines, ending='')
+        if options['clear'] and os.path.isdir(profiling.PROFILE_DIR):
+            shutil.rmtree(profiling.PROFILE_DIR)
+        self.stderr.write(f'Стеков: {len(stacks)}, '
+                          f'сэмплов: {sum(stacks.values())}')
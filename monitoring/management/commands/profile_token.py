@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from monitoring import profiling
+
+
+class Command(BaseCommand):
+    help = ('Печатает токен для заголовка X-Profile: запросы с ним '
+            'профилируются независимо от PROFILE_SAMPLE_RATE')
+
+    def handle(self, *args, **options):
+        self.stdout.write(profiling.make_token())
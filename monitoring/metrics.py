@@ -0,0 +1,246 @@
+import fcntl
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+
+METRICS_DIR = settings.METRICS_DIR
+FLUSH_INTERVAL = settings.METRICS_FLUSH_INTERVAL
+FILE_PATTERN = 'metrics.*.json'
+ARCHIVE_NAME = 'metrics.archive.json'
+LOCK_NAME = 'metrics.lock'
+
+REGISTRY = []
+
+
+class Store:
+    """Значения метрик процесса и их снимок в METRICS_DIR.
+
+    Каждый воркер копит значения у себя в памяти и не чаще раза
+    в FLUSH_INTERVAL секунд атомарно перезаписывает свой файл
+    metrics.<pid>.<uuid>.json: новый процесс с тем же PID пишет в другой
+    файл и не затирает итоги прежнего. Снимки завершившихся воркеров
+    мастер gunicorn переносит в общий архив (см. archive), а при выгрузке
+    архив и файлы живых процессов складываются, поэтому счётчики
+    отражают весь сервер.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lock = threading.Lock()
+        # (имя, метки) → значения: [счёт] у счётчика,
+        # [корзины..., +Inf, сумма] у гистограммы.
+        self.samples = {}
+        self.flushed = 0
+        self.name = f'metrics.{os.getpid()}.{uuid.uuid4().hex}.json'
+
+    def add(self, key, size, updates):
+        with self.lock:
+            values = self.samples.get(key)
+            if values is None:
+                values = self.samples[key] = [0] * size
+            for index, amount in updates:
+                values[index] += amount
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not METRICS_DIR or not force and (
+                now - self.flushed < FLUSH_INTERVAL):
+            return
+        with self.lock:
+            self.flushed = now
+            samples = {key: values[:]
+                       for key, values in self.samples.items()}
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        write(os.path.join(METRICS_DIR, self.name), samples)
+
+
+def write(path, samples):
+    """Атомарно заменяет снимок: читатель видит старый или новый."""
+    handle, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(handle, 'w') as file:
+        json.dump([[name, labels, values]
+                   for (name, labels), values in samples.items()], file)
+    os.replace(temporary, path)
+
+
+def read(paths):
+    """Сумма снимков из файлов: (имя, метки) → значения."""
+    totals = {}
+    for path in paths:
+        try:
+            with open(path) as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            # Файл процесса мог исчезнуть при очистке каталога.
+            continue
+        for name, labels, values in snapshot:
+            key = name, tuple(labels)
+            current = totals.setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                current[index] += value
+    return totals
+
+
+@contextmanager
+def locked(operation):
+    """Блокировка каталога снимков.
+
+    Перенос в архив не должен попасть между чтением архива и файла
+    воркера при выгрузке.
+    """
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    handle = os.open(
+        os.path.join(METRICS_DIR, LOCK_NAME), os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(handle, operation)
+        yield
+    finally:
+        os.close(handle)
+
+
+def archive(pid):
+    """Переносит снимки завершившегося процесса в общий архив.
+
+    Вызывается мастером gunicorn из child_exit, до запуска замены,
+    так что чужих файлов с этим PID ещё нет.
+    """
+    if not METRICS_DIR:
+        return
+    with locked(fcntl.LOCK_EX):
+        paths = glob.glob(os.path.join(METRICS_DIR, f'metrics.{pid}.*.json'))
+        if not paths:
+            return
+        path = os.path.join(METRICS_DIR, ARCHIVE_NAME)
+        write(path, read([path, *paths]))
+        for path in paths:
+            os.remove(path)
+
+
+store = Store()
+# Воркер, порождённый fork от мастера gunicorn, который уже импортировал
+# модуль, начинает свой снимок, а не пишет в файл родителя.
+os.register_at_fork(after_in_child=store.reset)
+
+
+class Metric:
+    kind = None
+    size = 1
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        REGISTRY.append(self)
+
+    def key(self, labels):
+        return self.name, tuple(str(labels[label]) for label in self.labels)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        store.add(self.key(labels), self.size, ((0, amount),))
+
+    def samples(self, labels, values):
+        yield self.name, labels, values[0]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=()):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+        self.size = len(buckets) + 2
+
+    def observe(self, value, **labels):
+        # Корзина — первая граница, не меньшая значения, или +Inf.
+        bucket = bisect_left(self.buckets, value)
+        store.add(self.key(labels), self.size,
+                  ((bucket, 1), (self.size - 1, value)))
+
+    def samples(self, labels, values):
+        count = 0
+        bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+        for bound, amount in zip(bounds, values):
+            count += amount
+            yield f'{self.name}_bucket', labels + (('le', bound),), count
+        yield f'{self.name}_sum', labels, values[-1]
+        yield f'{self.name}_count', labels, count
+
+
+LATENCY_BUCKETS = (
+    .005, .01, .025, .05, .075, .1, .25, .5, .75, 1, 2.5, 5, 10)
+
+REQUEST_SECONDS = Histogram(
+    'yatube_request_duration_seconds', 'Время обработки запроса',
+    ('view',), LATENCY_BUCKETS)
+RESPONSES = Counter(
+    'yatube_responses_total', 'Ответы по коду статуса', ('status',))
+REQUEST_QUERIES = Histogram(
+    'yatube_request_queries', 'SQL-запросов на один HTTP-запрос',
+    ('view',), (0, 1, 2, 5, 10, 20, 50, 100))
+CACHE_REQUESTS = Counter(
+    'yatube_cache_requests_total', 'Чтения из кэша: попадания и промахи',
+    ('result',))
+THUMBNAIL_SECONDS = Histogram(
+    'yatube_thumbnail_seconds', 'Время создания миниатюры', (),
+    (.01, .025, .05, .1, .25, .5, 1, 2.5))
+
+
+def escape(value):
+    return (value.replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{escape(value)}"' for name, value in labels)
+    return f'{{{pairs}}}'
+
+
+def merged():
+    """Сумма снимков всех процессов: (имя, метки) → значения."""
+    if not METRICS_DIR:
+        return {}
+    with locked(fcntl.LOCK_SH):
+        return read(glob.glob(os.path.join(METRICS_DIR, FILE_PATTERN)))
+
+
+def render():
+    """Метрики всех процессов в текстовом формате Prometheus."""
+    store.flush(force=True)
+    totals = merged()
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for (name, labels), values in sorted(totals.items()):
+            if name != metric.name:
+                continue
+            labels = tuple(zip(metric.labels, labels))
+            for sample, sample_labels, value in metric.samples(
+                    labels, values):
+                lines.append(
+                    f'{sample}{format_labels(sample_labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def record_request(view, status, duration, queries):
+    REQUEST_SECONDS.observe(duration, view=view)
+    RESPONSES.inc(status=status)
+    REQUEST_QUERIES.observe(queries, view=view)
+    store.flush()
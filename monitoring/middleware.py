@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from . import metrics, profiling
+from .timing import collect, query_timer
+
+SLOW_REQUEST_MS = settings.SLOW_REQUEST_MS
+SLOW_REQUEST_LOG = settings.SLOW_REQUEST_LOG
+# Участки Server-Timing в порядке вывода и что считает их счётчик.
+# Заголовки HTTP — только ASCII.
+METRICS = (('db', 'queries'), ('tpl', 'renders'), ('thumb', 'thumbnails'))
+
+log_lock = threading.Lock()
+
+
+def server_timing(timings, total):
+    parts = []
+    for name, unit in METRICS:
+        if name in timings.counts:
+            parts.append(
+                f'{name};dur={timings.durations[name] * 1000:.1f};'
+                f'desc="{timings.counts[name]} {unit}"')
+    parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
+
+
+def view_name(request, response):
+    match = request.resolver_match
+    if match:
+        return match.view_name
+    # Страницы из кэша анонимов отдаются до разбора URL.
+    if response.get('X-Page-Cache') == 'hit':
+        return 'page_cache'
+    return None
+
+
+def write_slow_request(request, response, timings, total):
+    record = {
+        'time': timezone.now().isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'view': view_name(request, response),
+        'status': response.status_code,
+        'total_ms': round(total * 1000, 1),
+        **{f'{name}_ms': round(timings.durations[name] * 1000, 1)
+           for name, unit in METRICS},
+        'queries': timings.counts['db'],
+        'top_queries': [
+            {'ms': round(duration * 1000, 2), 'sql': sql}
+            for duration, sql in timings.top_queries()
+        ],
+    }
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    os.makedirs(os.path.dirname(SLOW_REQUEST_LOG), exist_ok=True)
+    with log_lock, open(SLOW_REQUEST_LOG, 'a', encoding='utf-8') as file:
+        file.write(line)
+
+
+class ServerTimingMiddleware:
+    """Замеры запроса в заголовке Server-Timing и журнал медленных.
+
+    Время базы считается обёрткой execute_wrapper на каждом соединении,
+    шаблонов и миниатюр — бэкендами из monitoring.backends. Запросы
+    дольше SLOW_REQUEST_MS дописываются в SLOW_REQUEST_LOG строкой JSON
+    вместе с самыми долгими SQL-запросами. Те же замеры попадают
+    в метрики Prometheus (monitoring.metrics).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect() as timings, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_timer))
+            response = self.get_response(request)
+        total = timings.total()
+        response['Server-Timing'] = server_timing(timings, total)
+        metrics.record_request(
+            view_name(request, response) or 'unresolved',
+            response.status_code, total, timings.counts['db'])
+        if SLOW_REQUEST_LOG and total * 1000 >= SLOW_REQUEST_MS:
+            write_slow_request(request, response, timings, total)
+        return response
+
+
+class ProfilingMiddleware:
+    """Статистический профилировщик для части живых запросов.
+
+    Профилируется доля PROFILE_SAMPLE_RATE запросов и запросы
+    с подписанным заголовком X-Profile (см. profile_token). Стеки
+    копятся по имени view в PROFILE_DIR, выгружает их dump_profiles.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.should_profile(request):
+            return self.get_response(request)
+        sampler = profiling.Sampler(
+            threading.get_ident(), ProfilingMiddleware.__call__.__code__)
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = sampler.stop()
+        match = request.resolver_match
+        profiling.save(match.view_name if match else 'unresolved', stacks)
+        return response
@@ -0,0 +1,118 @@
+import os
+import random
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+
+SAMPLE_RATE = settings.PROFILE_SAMPLE_RATE
+INTERVAL = settings.PROFILE_INTERVAL
+PROFILE_DIR = settings.PROFILE_DIR
+TOKEN_MAX_AGE = settings.PROFILE_TOKEN_MAX_AGE
+HEADER = 'HTTP_X_PROFILE'
+SALT = 'monitoring.profiling'
+TOKEN_VALUE = 'profile'
+
+# Потоки воркера gthread дописывают в один файл процесса.
+save_lock = threading.Lock()
+
+
+def make_token():
+    return signing.TimestampSigner(salt=SALT).sign(TOKEN_VALUE)
+
+
+def has_valid_token(request):
+    token = request.META.get(HEADER)
+    if not token:
+        return False
+    try:
+        value = signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return value == TOKEN_VALUE
+
+
+def should_profile(request):
+    return (SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE or
+            has_valid_token(request))
+
+
+def frame_name(frame):
+    return f'{frame.f_globals.get("__name__", "?")}:{frame.f_code.co_name}'
+
+
+def collapse(frame, root_code):
+    """Стек от root_code до текущего кадра: «корень;...;лист»."""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        if frame.f_code is root_code:
+            break
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Sampler(threading.Thread):
+    """Раз в INTERVAL секунд снимает стек потока, обслуживающего запрос.
+
+    Профилируемый поток не замедляется инструментированием: вся работа
+    идёт в отдельном потоке и стоит лишь GIL на время снятия стека.
+    """
+
+    def __init__(self, thread_id, root_code, interval=None):
+        super().__init__(name='profiler', daemon=True)
+        self.thread_id = thread_id
+        self.root_code = root_code
+        self.interval = interval or INTERVAL
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame, self.root_code)] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.stacks
+
+
+def save(view_name, stacks):
+    """Дописывает стеки в файл процесса в формате collapsed stacks.
+
+    Первым кадром идёт имя view, так что один flamegraph делится
+    на страницы. Файлы разных процессов сливает dump_profiles.
+    """
+    if not stacks:
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    lines = ''.join(
+        f'{view_name};{stack} {count}\n' for stack, count in stacks.items())
+    path = os.path.join(PROFILE_DIR, f'stacks.{os.getpid()}.folded')
+    with save_lock, open(path, 'a', encoding='utf-8') as file:
+        file.write(lines)
+
+
+def load(view_names=None):
+    """Суммарные стеки всех процессов, по желанию только для view_names."""
+    stacks = Counter()
+    if not os.path.isdir(PROFILE_DIR):
+        return stacks
+    for name in sorted(os.listdir(PROFILE_DIR)):
+        if not name.endswith('.folded'):
+            continue
+        with open(os.path.join(PROFILE_DIR, name), encoding='utf-8') as file:
+            for line in file:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if not stack or not count.isdigit():
+                    # Строка, оборванная или перемешанная при записи.
+                    continue
+                if view_names and stack.split(';', 1)[0] not in view_names:
+                    continue
+                stacks[stack] += int(count)
+    return stacks
@@ -0,0 +1,109 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from monitoring import metrics
+from monitoring.backends import TimedThumbnailBackend
+from posts.models import Post, User
+
+INDEX_URL = reverse('index')
+METRICS_URL = reverse('monitoring:metrics')
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='text')
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        for target, name, value in (
+                (metrics, 'METRICS_DIR', self.directory),
+                (metrics, 'FLUSH_INTERVAL', 0),
+                (metrics, 'store', metrics.Store())):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def scrape(self):
+        response = self.guest_client.get(METRICS_URL)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode().splitlines()
+
+    def test_requests_counted(self):
+        self.guest_client.get(INDEX_URL)
+        self.guest_client.get('/missing/page/')
+        lines = self.scrape()
+        self.assertIn('yatube_responses_total{status="200"} 1', lines)
+        self.assertIn('yatube_responses_total{status="404"} 1', lines)
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="index"} 1', lines)
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="index",le="+Inf"} 1', lines)
+        self.assertIn('# TYPE yatube_request_queries histogram', lines)
+
+    def test_cache_hits_and_misses(self):
+        cache.set('present', 1)
+        cache.get('present')
+        cache.get('absent')
+        cache.get_many(['present', 'absent'])
+        # Сам запрос /metrics/ тоже читает кэш страниц анонимов.
+        lines = metrics.render().splitlines()
+        self.assertIn('yatube_cache_requests_total{result="hit"} 2', lines)
+        self.assertIn('yatube_cache_requests_total{result="miss"} 2', lines)
+
+    def write_snapshot(self, name, count):
+        with open(os.path.join(self.directory, name), 'w') as file:
+            json.dump([['yatube_responses_total', ['500'], [count]]], file)
+
+    def test_workers_aggregated(self):
+        # Снимок другого воркера складывается со своим.
+        self.write_snapshot('metrics.1.a.json', 3)
+        metrics.RESPONSES.inc(2, status='500')
+        lines = self.scrape()
+        self.assertIn('# TYPE yatube_responses_total counter', lines)
+        self.assertIn('yatube_responses_total{status="500"} 5', lines)
+
+    def test_dead_workers_archived(self):
+        self.write_snapshot('metrics.1.a.json', 3)
+        metrics.archive(1)
+        # Новый воркер получил тот же PID и пишет в свой файл.
+        self.write_snapshot('metrics.1.b.json', 4)
+        metrics.archive(1)
+        metrics.archive(1)
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            [metrics.ARCHIVE_NAME, metrics.LOCK_NAME])
+        self.assertIn(
+            'yatube_responses_total{status="500"} 7', self.scrape())
+
+    def test_forked_process_starts_own_snapshot(self):
+        metrics.RESPONSES.inc(status='500')
+        name = metrics.store.name
+        metrics.store.reset()
+        self.assertNotEqual(metrics.store.name, name)
+        self.assertNotIn(
+            'yatube_responses_total{status="500"} 1', metrics.render())
+
+    def test_thumbnail_generation_measured(self):
+        with mock.patch('sorl.thumbnail.base.ThumbnailBackend.'
+                        '_create_thumbnail'):
+            TimedThumbnailBackend()._create_thumbnail()
+        self.assertIn('yatube_thumbnail_seconds_count 1', self.scrape())
+
+    def test_foreign_addresses_rejected(self):
+        response = self.guest_client.get(
+            METRICS_URL, REMOTE_ADDR='203.0.113.1')
+        self.assertEqual(response.status_code, 404)
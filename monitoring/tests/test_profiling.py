@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from monitoring import profiling
+from posts.models import Post, User
+
+INDEX_URL = reverse('index')
+
+
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='text')
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+        self.directory = directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        for name, value in (('PROFILE_DIR', directory),
+                            ('INTERVAL', 0.0001),
+                            ('SAMPLE_RATE', 0)):
+            patcher = mock.patch.object(profiling, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def dump(self, *args):
+        out = StringIO()
+        call_command('dump_profiles', *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_requests_without_token_not_profiled(self):
+        self.guest_client.get(INDEX_URL, HTTP_X_PROFILE='forged')
+        self.assertEqual(self.dump(), '')
+
+    def test_token_profiles_request(self):
+        out = StringIO()
+        call_command('profile_token', stdout=out)
+        self.guest_client.get(
+            INDEX_URL, HTTP_X_PROFILE=out.getvalue().strip())
+        lines = self.dump('--view', 'index').splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            self.assertTrue(stack.startswith(
+                'index;monitoring.middleware:__call__'))
+            self.assertGreater(int(count), 0)
+        self.assertEqual(self.dump('--view', 'follow_index'), '')
+
+    def test_sample_rate_and_clear(self):
+        with mock.patch.object(profiling, 'SAMPLE_RATE', 1):
+            self.guest_client.get(INDEX_URL)
+        self.assertTrue(self.dump('--clear'))
+        self.assertEqual(self.dump(), '')
+
+    def test_saves_serialized(self):
+        # Потоки одного воркера не перемешивают строки в общем файле.
+        with profiling.save_lock:
+            thread = threading.Thread(
+                target=profiling.save, args=('index', {'a': 1}))
+            thread.start()
+            thread.join(0.1)
+            self.assertTrue(thread.is_alive())
+        thread.join()
+        self.assertEqual(profiling.load(), {'index;a': 1})
+
+    def test_malformed_lines_skipped(self):
+        path = os.path.join(self.directory, 'stacks.1.folded')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('index;a 2\nindex;b;c\nindex;a 3\nindex;d 1')
+        self.assertEqual(
+            profiling.load(), {'index;a': 5, 'index;d': 1})
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from sorl.thumbnail.base import ThumbnailBackend
+
+from monitoring import timing
+from monitoring.backends import TimedThumbnailBackend
+from posts.models import Post, User
+
+INDEX_URL = reverse('index')
+
+
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='text')
+        cls.guest_client = Client()
+
+    def setUp(self):
+        # Иначе страница придёт из кэша анонимов, минуя view
+        cache.clear()
+
+    def test_header_reports_database_and_templates(self):
+        header = self.guest_client.get(INDEX_URL)['Server-Timing']
+        names = [part.split(';')[0] for part in header.split(', ')]
+        self.assertEqual(names, ['db', 'tpl', 'total'])
+
+    def test_slow_requests_logged(self):
+        handle, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        with mock.patch('monitoring.middleware.SLOW_REQUEST_MS', 0), \
+                mock.patch('monitoring.middleware.SLOW_REQUEST_LOG', path):
+            self.guest_client.get(INDEX_URL)
+        with open(path) as file:
+            record = json.loads(file.readline())
+        self.assertEqual(record['view'], 'index')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], len(record['top_queries']))
+        self.assertIn('posts_post', record['top_queries'][0]['sql'])
+
+    def test_thumbnail_time_measured(self):
+        with mock.patch.object(ThumbnailBackend, 'get_thumbnail'), \
+                timing.collect() as timings:
+            TimedThumbnailBackend().get_thumbnail('file.jpg', '100x100')
+        self.assertEqual(timings.counts['thumb'], 1)
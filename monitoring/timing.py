@@ -0,0 +1,82 @@
+import heapq
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+TOP_QUERIES = 5
+
+_local = threading.local()
+
+
+class RequestTimings:
+    """Время, потраченное запросом на базу, шаблоны и миниатюры.
+
+    Участки могут вкладываться друг в друга: запросы ленивых QuerySet
+    и миниатюры выполняются во время рендера шаблона и входят в его
+    время.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        # Куча (длительность, sql) самых долгих запросов, не больше
+        # TOP_QUERIES штук, чтобы N+1 не раздувал память.
+        self.slowest = []
+
+    def add(self, name, duration):
+        self.durations[name] += duration
+        self.counts[name] += 1
+
+    def add_query(self, sql, duration):
+        self.add('db', duration)
+        item = (duration, sql)
+        if len(self.slowest) < TOP_QUERIES:
+            heapq.heappush(self.slowest, item)
+        else:
+            heapq.heappushpop(self.slowest, item)
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def top_queries(self):
+        return sorted(self.slowest, reverse=True)
+
+
+def current():
+    return getattr(_local, 'timings', None)
+
+
+@contextmanager
+def collect():
+    timings = _local.timings = RequestTimings()
+    try:
+        yield timings
+    finally:
+        _local.timings = None
+
+
+@contextmanager
+def measure(name):
+    timings = current()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def query_timer(execute, sql, params, many, context):
+    """execute_wrapper соединения: время каждого SQL-запроса."""
+    timings = current()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(sql, time.perf_counter() - started)
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+
+from . import metrics as store
+
+ALLOWED_IPS = settings.METRICS_ALLOWED_IPS
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@require_safe
+@never_cache
+def metrics(request):
+    """Метрики всех воркеров для Prometheus; чужим адресам — 404."""
+    if request.META.get('REMOTE_ADDR') not in ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(store.render(), content_type=CONTENT_TYPE)
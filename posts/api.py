@@ -0,0 +1,118 @@
+"""JSON-версия лент, постов и комментариев для мобильных клиентов.
+
+Ответы несут ETag из поколений кэша, так что опрос без изменений стоит
+пары обращений к кэшу и ответа 304.
+"""
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+
+from . import caching, conditional
+from .models import Comment, Group, Post, User
+from .paginator import CursorPaginator
+
+PER_PAGE = settings.PER_PAGE
+COMMENT_FIELDS = ('created', 'id')
+
+
+def post_data(request, post):
+    image = request.build_absolute_uri(post.image.url) if post.image else None
+    return {
+        'id': post.id,
+        'author': post.author.username,
+        'group': post.group.slug if post.group else None,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'image': image,
+        'comment_count': post.comment_count,
+    }
+
+
+def comment_data(comment):
+    return {
+        'id': comment.id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def page_data(request, page, serialize):
+    def link(name, cursor):
+        return (request.build_absolute_uri(f'{request.path}?{name}={cursor}')
+                if cursor else None)
+
+    return {
+        'results': [serialize(obj) for obj in page],
+        'next': link('after', page.next_cursor),
+        'previous': link('before', page.previous_cursor),
+    }
+
+
+def conditional_json(request, scope, build):
+    version, = caching.versions(scope)
+    etag = conditional.make_etag(request, [version])
+    response = conditional.respond(
+        request, etag, lambda: JsonResponse(
+            build(), json_dumps_params={'ensure_ascii': False}))
+    # Клиент может хранить ответ, но перед показом обязан сверить ETag.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def feed(request, scope, posts):
+    def build():
+        paginator = CursorPaginator(
+            posts.select_related('author', 'group'), PER_PAGE)
+        page = paginator.get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'))
+        return page_data(
+            request, page, lambda post: post_data(request, post))
+
+    return conditional_json(request, scope, build)
+
+
+@require_safe
+def index(request):
+    return feed(request, caching.INDEX, Post.objects.all())
+
+
+@require_safe
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed(request, caching.group_scope(group.id), group.posts.all())
+
+
+@require_safe
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed(
+        request, caching.author_scope(author.id), author.posts.all())
+
+
+@require_safe
+def post_view(request, post_id):
+    def build():
+        post = get_object_or_404(
+            Post.objects.select_related('author', 'group'), id=post_id)
+        return post_data(request, post)
+
+    return conditional_json(request, caching.post_scope(post_id), build)
+
+
+@require_safe
+def post_comments(request, post_id):
+    def build():
+        get_object_or_404(Post, id=post_id)
+        paginator = CursorPaginator(
+            Comment.objects.filter(post_id=post_id).select_related('author'),
+            PER_PAGE, COMMENT_FIELDS)
+        page = paginator.get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'))
+        return page_data(request, page, comment_data)
+
+    return conditional_json(request, caching.post_scope(post_id), build)
@@ -0,0 +1,14 @@
+from django.urls import path
+
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', api.index, name='index'),
+    path('posts/<int:post_id>/', api.post_view, name='post'),
+    path('posts/<int:post_id>/comments/',
+         api.post_comments, name='comments'),
+    path('groups/<slug:slug>/posts/', api.group_posts, name='group'),
+    path('users/<str:username>/posts/', api.profile, name='profile'),
+]
@@ -0,0 +1,52 @@
+import time
+
+from django.core.cache import cache
+
+GENERATION_KEY = 'generation:{}'
+INDEX = 'index'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def post_scopes(post_id, author_id, group_id=None):
+    """Ленты и страницы, на которых показывается пост."""
+    scopes = [INDEX, author_scope(author_id), post_scope(post_id)]
+    if group_id is not None:
+        scopes.append(group_scope(group_id))
+    return scopes
+
+
+def initial_generation():
+    # Ключ поколения мог быть вытеснен из кэша. Новое значение
+    # берём от текущего времени, чтобы оно было больше любого прежнего
+    # и старые фрагменты не ожили.
+    return int(time.time() * 1000)
+
+
+def bump(*scopes):
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, initial_generation(), None)
+
+
+def versions(*scopes):
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: initial_generation() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
@@ -0,0 +1,28 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+def make_etag(request, versions, *extra):
+    """ETag ответа из версий областей, адреса страницы и прочих различий.
+
+    Версии меняются при любой записи в область, так что ETag считается
+    без обращения к базе.
+    """
+    raw = ':'.join(map(str, [*versions, request.get_full_path(), *extra]))
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def respond(request, etag, build):
+    """304 по If-None-Match, иначе ответ build().
+
+    Last-Modified не отдаётся: правка или удаление поста и комментария
+    не сдвигают ни одну дату, и клиент с If-Modified-Since получил бы
+    304 на устаревшие данные. ETag же меняется с поколением области.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = build()
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,67 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, Profile, User
+
+
+def change_comment_count(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(comment_count=F('comment_count') + delta)
+
+
+def comments_subquery():
+    return Coalesce(Subquery(
+        Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+            'post').annotate(total=Count('id')).values('total'),
+        output_field=IntegerField()), 0)
+
+
+def recount_comments(posts=None):
+    """Пересчитывает счётчики; возвращает число исправленных постов."""
+    if posts is None:
+        posts = Post.objects.all()
+    return posts.annotate(actual=comments_subquery()).exclude(
+        comment_count=F('actual')).update(comment_count=comments_subquery())
+
+
+def follow_subquery(field):
+    return Coalesce(Subquery(
+        Follow.objects.filter(**{field: OuterRef('user')}).order_by().values(
+            field).annotate(total=Count('id')).values('total'),
+        output_field=IntegerField()), 0)
+
+
+def change_profile_count(user_id, field, delta):
+    profiles = Profile.objects.filter(user_id=user_id)
+    if delta < 0:
+        profiles = profiles.filter(**{f'{field}__gte': -delta})
+    if not profiles.update(**{field: F(field) + delta}):
+        # Профиля нет (или счётчик разошёлся) — считаем заново.
+        recount_follows(User.objects.filter(pk=user_id))
+
+
+def change_follow_counts(user_id, author_id, delta):
+    change_profile_count(user_id, 'following_count', delta)
+    change_profile_count(author_id, 'followers_count', delta)
+
+
+def recount_follows(users=None):
+    """Создаёт недостающие профили и сверяет счётчики подписок.
+
+    Возвращает число исправленных профилей.
+    """
+    if users is None:
+        users = User.objects.all()
+    Profile.objects.bulk_create(
+        [Profile(user_id=pk) for pk in users.filter(
+            profile__isnull=True).values_list('pk', flat=True)],
+        ignore_conflicts=True)
+    followers = follow_subquery('author')
+    following = follow_subquery('user')
+    return Profile.objects.filter(user__in=users).annotate(
+        actual_followers=followers, actual_following=following).exclude(
+        followers_count=F('actual_followers'),
+        following_count=F('actual_following')).update(
+        followers_count=followers, following_count=following)
@@ -0,0 +1,79 @@
+import csv
+import json
+
+from django.conf import settings
+
+from .paginator import keyset_filter, keyset_order
+
+CHUNK_SIZE = settings.EXPORT_CHUNK_SIZE
+# Колонки CSV совпадают с полями, которые понимает import_posts.
+CSV_COLUMNS = (
+    'type', 'id', 'author', 'group', 'post', 'text', 'pub_date', 'created')
+
+
+def keyset_chunks(queryset, fields, chunk_size=None):
+    """Строки queryset от старых к новым короткими запросами по ключу.
+
+    Каждая пачка — отдельный запрос с LIMIT, так что ни курсор, ни
+    транзакция не висят открытыми, пока клиент медленно скачивает файл.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    date_field, pk_field = fields
+    key = None
+    while True:
+        chunk = keyset_order(queryset, fields, reverse=True)
+        if key is not None:
+            chunk = keyset_filter(chunk, fields, key, reverse=True)
+        count = 0
+        for row in chunk[:chunk_size].iterator(chunk_size=chunk_size):
+            count += 1
+            yield row
+        if count < chunk_size:
+            return
+        key = row[date_field], row[pk_field]
+
+
+def records(author):
+    username = author.username
+    posts = author.posts.values(
+        'id', 'group__slug', 'text', 'pub_date', 'image')
+    for post in keyset_chunks(posts, ('pub_date', 'id')):
+        yield {
+            'type': 'post',
+            'id': post['id'],
+            'author': username,
+            'group': post['group__slug'],
+            'text': post['text'],
+            'pub_date': post['pub_date'].isoformat(),
+            'image': post['image'] or None,
+        }
+    comments = author.comments.values('id', 'post_id', 'text', 'created')
+    for comment in keyset_chunks(comments, ('created', 'id')):
+        yield {
+            'type': 'comment',
+            'id': comment['id'],
+            'author': username,
+            'post': comment['post_id'],
+            'text': comment['text'],
+            'created': comment['created'].isoformat(),
+        }
+
+
+def as_jsonl(author):
+    for record in records(author):
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: строку не пишет, а отдаёт."""
+
+    def write(self, value):
+        return value
+
+
+def as_csv(author):
+    writer = csv.DictWriter(
+        Echo(), CSV_COLUMNS, extrasaction='ignore', restval='')
+    yield writer.writeheader()
+    for record in records(author):
+        yield writer.writerow(record)
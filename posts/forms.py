@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from . import images
 from .models import Post, Comment
 
 
@@ -8,6 +10,14 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('group', 'text', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            # Копии прежней картинки к новой не подходят.
+            self.instance.image_variants = False
+            return images.ingest(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
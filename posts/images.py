@@ -0,0 +1,118 @@
+import os
+import warnings
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, JpegImagePlugin
+
+MAX_PIXELS = settings.IMAGE_MAX_PIXELS
+MAX_SIDE = settings.IMAGE_MAX_SIDE
+VARIANTS = settings.POST_IMAGE_VARIANTS
+WEBP_QUALITY = 80
+# Форматы, которые сохраняем как есть.
+KEPT_FORMATS = ('JPEG', 'PNG', 'WEBP')
+# Режимы, которым нужен PNG: прозрачность, палитра, однобитная графика.
+LOSSLESS_MODES = ('1', 'P', 'PA', 'LA', 'RGBA')
+
+
+def open_checked(file):
+    """Открывает картинку, читая только заголовок.
+
+    Размер проверяется до декодирования пикселей, так что «бомба»
+    из маленького файла с огромными размерами не займёт память.
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            image = Image.open(file)
+    except (Image.DecompressionBombWarning, Image.DecompressionBombError):
+        raise ValidationError('Картинка слишком большая.')
+    except OSError:
+        raise ValidationError('Загрузите правильное изображение.')
+    if image.width * image.height > MAX_PIXELS:
+        raise ValidationError(
+            f'Картинка больше {MAX_PIXELS // 1_000_000} мегапикселей.')
+    return image
+
+
+def target_format(image):
+    """Формат, в котором сохраняется перекодированная картинка.
+
+    Камеры телефонов пишут MPO — JPEG с дополнительными кадрами, и его
+    Pillow открывает подклассом JPEG; такие снимки и прочие картинки
+    без прозрачности и палитры сжимаются в JPEG, а не раздуваются
+    в PNG без потерь.
+    """
+    if isinstance(image, JpegImagePlugin.JpegImageFile):
+        return 'JPEG'
+    if image.format in KEPT_FORMATS:
+        return image.format
+    if image.mode in LOSSLESS_MODES or 'transparency' in image.info:
+        return 'PNG'
+    return 'JPEG'
+
+
+def ingest(uploaded):
+    """Приводит загруженную картинку к допустимому виду.
+
+    Слишком большие картинки уменьшаются до MAX_SIDE по длинной
+    стороне, EXIF (геометка, модель камеры) отбрасывается. Небольшие
+    картинки без EXIF возвращаются без перекодирования.
+    """
+    uploaded.seek(0)
+    image = open_checked(uploaded)
+    too_large = max(image.size) > MAX_SIDE
+    if not too_large and not image.getexif():
+        uploaded.seek(0)
+        return uploaded
+    image_format = target_format(image)
+    # Для JPEG декодер сразу уменьшает картинку в 2, 4 или 8 раз,
+    # не разворачивая её в памяти в полном размере. PNG и WebP draft()
+    # не ускоряет: они декодируются целиком, и их память ограничивает
+    # только проверка MAX_PIXELS в open_checked.
+    image.draft('RGB', (MAX_SIDE, MAX_SIDE))
+    image = ImageOps.exif_transpose(image)
+    # reducing_gap включает быстрый Image.reduce() перед точным ресайзом.
+    image.thumbnail((MAX_SIDE, MAX_SIDE), reducing_gap=3.0)
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    output = BytesIO()
+    image.save(output, image_format, optimize=True, quality=85)
+    name, _ = os.path.splitext(uploaded.name)
+    return ContentFile(
+        output.getvalue(), name=f'{name}.{image_format.lower()}')
+
+
+def variant_name(name, width):
+    stem, _ = os.path.splitext(name)
+    return f'{stem}.{width}w.webp'
+
+
+def write_variants(name, storage=default_storage):
+    """Сохраняет рядом с оригиналом WebP-копии под размеры карточки."""
+    with storage.open(name) as file:
+        image = open_checked(file)
+        # Под самую большую копию; уменьшает при декодировании только JPEG.
+        image.draft('RGB', max(VARIANTS))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands()
+                                  else 'RGB')
+        for size in VARIANTS:
+            variant = ImageOps.fit(image, size, Image.LANCZOS)
+            output = BytesIO()
+            variant.save(output, 'WEBP', quality=WEBP_QUALITY, method=4)
+            target = variant_name(name, size[0])
+            storage.delete(target)
+            storage.save(target, ContentFile(output.getvalue()))
+
+
+def srcset(name, storage=default_storage):
+    """srcset WebP-копий; что они готовы, знает Post.image_variants."""
+    return ', '.join(
+        f'{storage.url(variant_name(name, width))} {width}w'
+        for width, height in VARIANTS
+    )
@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+MODES = ('delete', 'wal')
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+def copy_database(source, target):
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def remove_database(name):
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(name + suffix):
+            os.remove(name + suffix)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает конкурентное чтение лент и запись постов '
+            'в режимах журнала SQLite delete и WAL')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seconds', type=float, default=10,
+            help='длительность прогона в каждом режиме')
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='число потоков, читающих ленты')
+        parser.add_argument(
+            '--mode', choices=MODES, action='append',
+            help='режим журнала, по умолчанию оба')
+
+    def handle(self, *args, **options):
+        database = connections['default'].settings_dict
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Бенчмарк рассчитан на SQLite')
+        source = database['NAME']
+        for mode in options['mode'] or MODES:
+            # Каждый режим гоняется на своей копии базы, чтобы не
+            # засорять рабочую базу постами и не наследовать WAL.
+            handle, copy = tempfile.mkstemp(suffix='.sqlite3')
+            os.close(handle)
+            connections.close_all()
+            copy_database(source, copy)
+            database['NAME'] = copy
+            try:
+                with override_settings(
+                    SQLITE_PRAGMAS={
+                        **settings.SQLITE_PRAGMAS, 'journal_mode': mode},
+                    CACHES=DUMMY_CACHES,
+                ):
+                    self.run_mode(mode, options)
+            finally:
+                connections.close_all()
+                database['NAME'] = source
+                remove_database(copy)
+
+    def feed_urls(self):
+        urls = [reverse('index')]
+        for slug in Group.objects.values_list('slug', flat=True)[:3]:
+            urls.append(reverse('group_slug', args=[slug]))
+        for username in User.objects.filter(
+            posts__isnull=False,
+        ).values_list('username', flat=True).distinct()[:3]:
+            urls.append(reverse('profile', args=[username]))
+        return urls
+
+    def run_mode(self, mode, options):
+        author, _ = User.objects.get_or_create(username='bench_writer')
+        urls = self.feed_urls()
+        connections.close_all()
+        stop = threading.Event()
+        reads, writes, errors = [], [], []
+
+        def reader(offset):
+            client = Client()
+            step = offset
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    client.get(urls[step % len(urls)])
+                except DatabaseError as error:
+                    errors.append(error)
+                else:
+                    reads.append(time.perf_counter() - started)
+                step += 1
+            connections.close_all()
+
+        def writer():
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    Post.objects.create(author=author, text='bench')
+                except DatabaseError as error:
+                    errors.append(error)
+                else:
+                    writes.append(time.perf_counter() - started)
+            connections.close_all()
+
+        threads = [
+            threading.Thread(target=reader, args=(number,))
+            for number in range(options['readers'])
+        ]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        self.report(mode, options['seconds'], reads, writes, errors)
+
+    def report(self, mode, seconds, reads, writes, errors):
+        def p95(samples):
+            if len(samples) < 2:
+                return 0
+            return statistics.quantiles(samples, n=20)[-1] * 1000
+
+        self.stdout.write(
+            f'{mode:>6}: чтений {len(reads) / seconds:7.1f}/с '
+            f'(p95 {p95(reads):6.1f} мс), '
+            f'записей {len(writes) / seconds:6.1f}/с '
+            f'(p95 {p95(writes):6.1f} мс), ошибок {len(errors)}')
@@ -0,0 +1,149 @@
+import json
+import platform
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Post, Profile
+
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+def percentile(cuts, number):
+    return round(cuts[number - 1] * 1000, 2)
+
+
+class Command(BaseCommand):
+    help = ('Прогоняет основные страницы через тестовый клиент и пишет '
+            'задержки p50/p95/p99, число запросов к базе и пропускную '
+            'способность в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='запросов на сценарий')
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='запросов на прогрев, не учитываются')
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='отключить кэш, чтобы мерить путь до базы')
+        parser.add_argument(
+            '--scenario', action='append',
+            help='только указанные сценарии')
+        parser.add_argument('--output', help='файл для JSON с результатами')
+        parser.add_argument(
+            '--baseline', help='JSON прошлого прогона для сравнения')
+
+    def handle(self, *args, **options):
+        scenarios = self.scenarios()
+        names = options['scenario'] or list(scenarios)
+        unknown = set(names) - set(scenarios)
+        if unknown:
+            raise CommandError(f'Нет сценариев: {", ".join(unknown)}')
+        caches = DUMMY_CACHES if options['no_cache'] else settings.CACHES
+        results = {}
+        with override_settings(CACHES=caches):
+            for name in names:
+                results[name] = self.run(
+                    scenarios[name], options['requests'], options['warmup'])
+                self.report(name, results[name])
+        report = {
+            'date': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'cache': not options['no_cache'],
+            'posts': Post.objects.count(),
+            'requests': options['requests'],
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.compare(options['baseline'], results)
+
+    def scenarios(self):
+        """Сценарии на самых тяжёлых объектах базы."""
+        celebrity = Profile.objects.select_related('user').order_by(
+            '-followers_count').first()
+        reader = Profile.objects.select_related('user').order_by(
+            '-following_count').first()
+        post = Post.objects.select_related('author').order_by(
+            '-comment_count').first()
+        if not (celebrity and reader and post):
+            raise CommandError('База пуста, сначала запустите seed')
+        guest = Client()
+        member = Client()
+        member.force_login(reader.user)
+        post_url = reverse('post', args=[post.author.username, post.id])
+        comment_url = reverse(
+            'add_comment', args=[post.author.username, post.id])
+        return {
+            'index': lambda: guest.get(reverse('index')),
+            'follow_index': lambda: member.get(reverse('follow_index')),
+            'profile': lambda: guest.get(
+                reverse('profile', args=[celebrity.user.username])),
+            'post_view': lambda: member.get(post_url),
+            'add_comment': lambda: member.post(
+                comment_url, {'text': 'Комментарий из бенчмарка'}),
+        }
+
+    def run(self, scenario, requests, warmup):
+        timings, queries, statuses = [], [], {}
+        # Записи сценария add_comment откатываются вместе с транзакцией.
+        with transaction.atomic():
+            for _ in range(warmup):
+                scenario()
+            started = time.perf_counter()
+            for _ in range(requests):
+                with CaptureQueriesContext(connection) as context:
+                    request_started = time.perf_counter()
+                    response = scenario()
+                    timings.append(time.perf_counter() - request_started)
+                queries.append(len(context.captured_queries))
+                status = str(response.status_code)
+                statuses[status] = statuses.get(status, 0) + 1
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        cuts = statistics.quantiles(timings, n=100)
+        return {
+            'p50_ms': percentile(cuts, 50),
+            'p95_ms': percentile(cuts, 95),
+            'p99_ms': percentile(cuts, 99),
+            'mean_ms': round(statistics.mean(timings) * 1000, 2),
+            'rps': round(requests / elapsed, 1),
+            'queries_mean': round(statistics.mean(queries), 2),
+            'queries_max': max(queries),
+            'statuses': statuses,
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:>13}: p50 {result["p50_ms"]:8.2f} мс  '
+            f'p95 {result["p95_ms"]:8.2f} мс  '
+            f'p99 {result["p99_ms"]:8.2f} мс  '
+            f'{result["rps"]:7.1f} запр/с  '
+            f'запросов к базе {result["queries_mean"]:.1f}')
+
+    def compare(self, path, results):
+        with open(path) as file:
+            baseline = json.load(file)['results']
+        self.stdout.write(f'Сравнение с {path} (p95, запр/с):')
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            before = baseline[name]
+            self.stdout.write(
+                f'{name:>13}: p95 {before["p95_ms"]:.2f} → '
+                f'{result["p95_ms"]:.2f} мс, '
+                f'{before["rps"]:.1f} → {result["rps"]:.1f} запр/с')
@@ -0,0 +1,282 @@
+import csv
+import json
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import caching, timeline
+from posts.counters import recount_comments, recount_follows
+from posts.models import Comment, Follow, Group, Post, User
+
+# В таком порядке сбрасываются буферы: комментарии ссылаются на посты.
+TYPES = ('post', 'comment', 'follow')
+MODELS = {'post': Post, 'comment': Comment, 'follow': Follow}
+
+
+class LookupCache:
+    """Ограниченный LRU-кэш «имя → id», промахи тоже запоминаются."""
+
+    def __init__(self, queryset, field, size):
+        self.queryset = queryset
+        self.field = field
+        self.size = size
+        self.items = OrderedDict()
+
+    def get(self, name):
+        if name in self.items:
+            self.items.move_to_end(name)
+            return self.items[name]
+        pk = self.queryset.filter(**{self.field: name}).values_list(
+            'pk', flat=True).first()
+        self.items[name] = pk
+        if len(self.items) > self.size:
+            self.items.popitem(last=False)
+        return pk
+
+
+@contextmanager
+def keep_dates(*fields):
+    """Отключает auto_now_add, чтобы сохранить даты из архива."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def read_records(file, data_format, record_type):
+    if data_format == 'csv':
+        reader = csv.DictReader(file)
+        # Колонку type пишет выгрузка export, --type нужен файлам без неё.
+        if 'type' not in (reader.fieldnames or ()) and not record_type:
+            raise CommandError('В CSV нет колонки type, укажите --type')
+        for record in reader:
+            if not record.get('type'):
+                record['type'] = record_type
+            yield record
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает посты, комментарии и подписки '
+            'из JSONL или CSV пачками bulk_create')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл или - для stdin')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='формат, по умолчанию по расширению файла')
+        parser.add_argument(
+            '--type', choices=TYPES,
+            help='тип записей CSV-файла без колонки type')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='строк в одной транзакции')
+        parser.add_argument(
+            '--cache-size', type=int, default=100_000,
+            help='сколько username и slug держать в памяти')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        data_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl')
+        self.batch_size = options['batch_size']
+        self.users = LookupCache(
+            User.objects.all(), 'username', options['cache_size'])
+        self.groups = LookupCache(
+            Group.objects.all(), 'slug', options['cache_size'])
+        self.buffers = {record_type: [] for record_type in TYPES}
+        self.written = dict.fromkeys(TYPES, 0)
+        self.skipped = 0
+        # Поколения кэша страниц, которые затронет загрузка.
+        self.scopes = {caching.INDEX}
+        # ignore_conflicts молча пропускает уже существующие подписки,
+        # поэтому записанные считаются по таблице.
+        self.follows_before = Follow.objects.count()
+        self.started = time.monotonic()
+        file = (sys.stdin if path == '-'
+                else open(path, newline='', encoding='utf-8'))
+        try:
+            with keep_dates(Post._meta.get_field('pub_date'),
+                            Comment._meta.get_field('created')):
+                for number, record in enumerate(read_records(
+                        file, data_format, options['type']), 1):
+                    self.add(number, record)
+                self.flush()
+        finally:
+            if file is not sys.stdin:
+                file.close()
+            # Уже записанные пачки приводятся в порядок, даже если
+            # загрузка оборвалась.
+            self.finish()
+
+    def add(self, number, record):
+        record_type = record.get('type')
+        try:
+            obj = getattr(self, f'build_{record_type}')(record)
+        except (AttributeError, KeyError, ValueError) as error:
+            obj = None
+            self.stderr.write(f'Строка {number}: {error!r}')
+        if obj is None:
+            self.skipped += 1
+            return
+        self.buffers[record_type].append(obj)
+        if record_type == 'post':
+            self.scopes.add(caching.author_scope(obj.author_id))
+            if obj.group_id:
+                self.scopes.add(caching.group_scope(obj.group_id))
+        elif record_type == 'follow':
+            self.scopes.update((caching.author_scope(obj.user_id),
+                                caching.author_scope(obj.author_id)))
+        if len(self.buffers[record_type]) >= self.batch_size:
+            self.flush()
+
+    def parse_date(self, value):
+        if not value:
+            return timezone.now()
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(f'дата {value!r}')
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    def build_post(self, record):
+        author_id = self.users.get(record['author'])
+        group_id = None
+        if record.get('group'):
+            group_id = self.groups.get(record['group'])
+            if group_id is None:
+                raise ValueError(f'нет группы {record["group"]!r}')
+        if author_id is None:
+            raise ValueError(f'нет пользователя {record["author"]!r}')
+        return Post(
+            id=record.get('id') or None, author_id=author_id,
+            group_id=group_id, text=record['text'],
+            pub_date=self.parse_date(record.get('pub_date')))
+
+    def build_comment(self, record):
+        author_id = self.users.get(record['author'])
+        if author_id is None:
+            raise ValueError(f'нет пользователя {record["author"]!r}')
+        return Comment(
+            id=record.get('id') or None,
+            post_id=int(record['post']), author_id=author_id,
+            text=record['text'],
+            created=self.parse_date(record.get('created')))
+
+    def build_follow(self, record):
+        user_id = self.users.get(record['user'])
+        author_id = self.users.get(record['author'])
+        if user_id is None or author_id is None:
+            raise ValueError('нет пользователя')
+        if user_id == author_id:
+            return None
+        return Follow(user_id=user_id, author_id=author_id)
+
+    def flush(self):
+        for record_type in TYPES:
+            objects = self.buffers[record_type]
+            self.buffers[record_type] = []
+            if record_type == 'comment':
+                objects = self.with_existing_posts(objects)
+            if not objects:
+                continue
+            if record_type == 'post':
+                last_post = Post.objects.aggregate(
+                    last=Max('id'))['last'] or 0
+            self.written[record_type] += self.insert(record_type, objects)
+            # bulk_create не шлёт сигналов: счётчики и ленты пачки
+            # поправляются сразу, затрагивая только её строки.
+            if record_type == 'post':
+                self.fix_up_posts(objects, last_post)
+            elif record_type == 'comment':
+                recount_comments(Post.objects.filter(
+                    id__in={comment.post_id for comment in objects}))
+            else:
+                self.fix_up_follows(objects)
+        total = sum(self.written.values())
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f'Обработано {total} строк, {total / elapsed:.0f} строк/с')
+
+    def insert(self, record_type, objects):
+        """Записывает пачку; возвращает число записанных строк."""
+        manager = MODELS[record_type].objects
+        ignore_conflicts = record_type == 'follow'
+        try:
+            with transaction.atomic():
+                manager.bulk_create(objects, ignore_conflicts=ignore_conflicts)
+            return len(objects)
+        except IntegrityError:
+            pass
+        # Пачка откатилась целиком, например из-за уже занятого id при
+        # повторной загрузке выгрузки: строки пишутся по одной, и
+        # пропускаются только конфликтующие.
+        written = 0
+        for obj in objects:
+            try:
+                with transaction.atomic():
+                    manager.bulk_create(
+                        [obj], ignore_conflicts=ignore_conflicts)
+            except IntegrityError as error:
+                self.skipped += 1
+                self.stderr.write(f'{record_type} id={obj.pk}: {error}')
+            else:
+                written += 1
+        return written
+
+    def fix_up_posts(self, posts, last_post):
+        # SQLite не возвращает id из bulk_create: новые посты ищутся
+        # за прежним максимумом. Посты, записанные в это время
+        # веб-запросами, уже разосланы, и повторная рассылка их
+        # не задублирует.
+        given = {post.id for post in posts if post.id}
+        timeline.fan_out_many(Post.objects.filter(
+            Q(id__gt=last_post) | Q(id__in=given),
+        ).values_list('id', 'author_id', 'pub_date'))
+
+    def fix_up_follows(self, follows):
+        users = set()
+        for follow in follows:
+            users.update((follow.user_id, follow.author_id))
+        recount_follows(User.objects.filter(pk__in=users))
+        for author_id in {follow.author_id for follow in follows}:
+            timeline.switch_fanout(author_id)
+        for follow in follows:
+            timeline.backfill(follow.user_id, follow.author_id)
+
+    def with_existing_posts(self, comments):
+        posts = Post.objects.filter(
+            id__in={comment.post_id for comment in comments},
+        ).values_list('id', 'author_id', 'group_id')
+        existing = set()
+        for post_id, author_id, group_id in posts:
+            existing.add(post_id)
+            self.scopes.update(
+                caching.post_scopes(post_id, author_id, group_id))
+        kept = [
+            comment for comment in comments if comment.post_id in existing]
+        self.skipped += len(comments) - len(kept)
+        return kept
+
+    def finish(self):
+        # Кэш общий с веб-воркерами, поэтому не очищается, а сдвигаются
+        # поколения затронутых страниц.
+        caching.bump(*self.scopes)
+        self.written['follow'] = Follow.objects.count() - self.follows_before
+        self.stdout.write(
+            'Постов: {post}, комментариев: {comment}, подписок: {follow}'
+            .format(**self.written) + f', пропущено: {self.skipped}')
@@ -0,0 +1,60 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand
+
+
+def fetch(url, timeout):
+    started = time.perf_counter()
+    try:
+        with urlopen(url, timeout=timeout) as response:
+            response.read()
+    except (URLError, OSError) as error:
+        return None, error
+    return time.perf_counter() - started, None
+
+
+class Command(BaseCommand):
+    help = ('Нагружает запущенный сервер параллельными запросами к лентам, '
+            'чтобы сравнить режимы воркеров gunicorn')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default='http://127.0.0.1:8000',
+            help='адрес запущенного сервера')
+        parser.add_argument(
+            '--path', action='append',
+            help='страница для запросов, можно несколько; по умолчанию /')
+        parser.add_argument(
+            '--concurrency', type=int, default=32,
+            help='число одновременных клиентов')
+        parser.add_argument(
+            '--requests', type=int, default=1000,
+            help='всего запросов')
+        parser.add_argument(
+            '--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        paths = options['path'] or ['/']
+        urls = [
+            options['url'].rstrip('/') + paths[number % len(paths)]
+            for number in range(options['requests'])
+        ]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(
+                lambda url: fetch(url, options['timeout']), urls))
+        elapsed = time.perf_counter() - started
+        timings = sorted(timing for timing, error in results if error is None)
+        errors = len(results) - len(timings)
+        if len(timings) < 2:
+            self.stderr.write(f'Успешных запросов: {len(timings)}')
+            return
+        cuts = statistics.quantiles(timings, n=100)
+        self.stdout.write(
+            f'{len(results) / elapsed:.1f} запросов/с, '
+            f'p50 {cuts[49] * 1000:.1f} мс, p95 {cuts[94] * 1000:.1f} мс, '
+            f'ошибок {errors}')
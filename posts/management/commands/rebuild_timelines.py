@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+from posts.models import Follow, TimelineEntry
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', help='username читателя, чью ленту пересобрать')
+
+    def handle(self, *args, **options):
+        follows = Follow.objects.order_by('user_id')
+        entries = TimelineEntry.objects.all()
+        if options['user']:
+            follows = follows.filter(user__username=options['user'])
+            entries = entries.filter(user__username=options['user'])
+        with transaction.atomic():
+            entries.delete()
+            count = 0
+            for user_id, author_id in follows.values_list(
+                    'user_id', 'author_id').iterator():
+                timeline.backfill(user_id, author_id)
+                count += 1
+        self.stdout.write(f'Подписок обработано: {count}')
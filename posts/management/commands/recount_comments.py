@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_comments
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев у постов'
+
+    def handle(self, *args, **options):
+        fixed = recount_comments()
+        self.stdout.write(f'Исправлено постов: {fixed}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_follows
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики подписчиков и подписок с таблицей Follow'
+
+    def handle(self, *args, **options):
+        fixed = recount_follows()
+        self.stdout.write(f'Исправлено профилей: {fixed}')
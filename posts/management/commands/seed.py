@@ -0,0 +1,156 @@
+import datetime as dt
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from posts.counters import recount_comments, recount_follows
+from posts.models import Comment, Follow, Group, Post, User
+
+from .import_posts import keep_dates
+
+PERIOD = dt.timedelta(days=365)
+# Показатель закона Ципфа: чем больше, тем сильнее перекос
+# в пользу первых (самых популярных) авторов.
+ZIPF_EXPONENT = 1.1
+
+
+def zipf_weights(count):
+    return list(accumulate(1 / (rank + 1) ** ZIPF_EXPONENT
+                           for rank in range(count)))
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими пользователями, постами, '
+            'комментариями и подписками со степенным перекосом')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--comments', type=int, default=2_000_000)
+        parser.add_argument(
+            '--follows', type=int, default=30,
+            help='среднее число подписок на пользователя')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument(
+            '--random-seed', type=int, default=1,
+            help='одинаковый seed даёт одинаковые данные')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['random_seed'])
+        self.batch_size = options['batch_size']
+        self.started = time.monotonic()
+        prefix = options['prefix']
+        users = self.create_users(prefix, options['users'])
+        groups = self.create_groups(prefix, options['groups'])
+        # Ранг пользователя в списке и есть его популярность: первые
+        # пишут больше всех и собирают больше всех подписчиков.
+        weights = zipf_weights(len(users))
+        with keep_dates(Post._meta.get_field('pub_date'),
+                        Comment._meta.get_field('created')):
+            self.create_posts(users, weights, groups, options['posts'])
+            self.create_comments(users, options['comments'])
+        self.create_follows(users, weights, options['follows'])
+        self.log('Пересчёт счётчиков и лент')
+        recount_comments()
+        recount_follows()
+        cache.clear()
+        call_command('rebuild_timelines', stdout=self.stdout)
+        cache.clear()
+        self.log('Готово')
+
+    def log(self, message):
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(f'[{elapsed:7.1f} с] {message}')
+
+    def in_batches(self, model, total, build, **options):
+        for start in range(0, total, self.batch_size):
+            count = min(self.batch_size, total - start)
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    [build() for _ in range(count)], **options)
+            self.log(f'{model._meta.verbose_name_plural}: {start + count}')
+
+    def create_users(self, prefix, total):
+        # Один хеш на всех: хешировать миллион паролей дольше, чем
+        # создать всё остальное.
+        password = make_password(None)
+        numbers = iter(range(total))
+        self.in_batches(User, total, lambda: User(
+            username=f'{prefix}{next(numbers)}', password=password),
+            ignore_conflicts=True)
+        return list(User.objects.filter(
+            username__startswith=prefix).order_by('id').values_list(
+            'id', flat=True))
+
+    def create_groups(self, prefix, total):
+        Group.objects.bulk_create([
+            Group(title=f'Группа {number}', slug=f'{prefix}-{number}',
+                  description='')
+            for number in range(total)
+        ], ignore_conflicts=True)
+        return list(Group.objects.filter(
+            slug__startswith=f'{prefix}-').values_list('id', flat=True))
+
+    def create_posts(self, users, weights, groups, total):
+        # Даты растут вместе с id, как у настоящих постов.
+        start = timezone.now() - PERIOD
+        numbers = iter(range(total))
+        choices = self.random.choices
+
+        def build():
+            group_id = self.random.choice(groups) if (
+                groups and self.random.random() < 0.5) else None
+            return Post(
+                author_id=choices(users, cum_weights=weights)[0],
+                group_id=group_id, text='Синтетический пост. ' * 10,
+                pub_date=start + PERIOD * (next(numbers) / total))
+
+        self.in_batches(Post, total, build)
+
+    def create_comments(self, users, total):
+        ids = Post.objects.order_by('id').values_list('id', flat=True)
+        if not ids.exists():
+            return
+        first, last = ids.first(), ids.last()
+        now = timezone.now()
+
+        def build():
+            # Свежие посты обсуждают чаще старых.
+            share = 1 - self.random.random() ** 3
+            post_id = first + int((last - first) * share)
+            posted = now - PERIOD * (1 - share)
+            return Comment(
+                post_id=post_id, author_id=self.random.choice(users),
+                text='Синтетический комментарий',
+                created=posted + (now - posted) * self.random.random())
+
+        self.in_batches(Comment, total, build)
+
+    def create_follows(self, users, weights, mean):
+        pending = []
+        for user_id in users:
+            count = min(int(self.random.expovariate(1 / mean)), len(users))
+            authors = set(self.random.choices(
+                users, cum_weights=weights, k=count))
+            authors.discard(user_id)
+            pending.extend(
+                Follow(user_id=user_id, author_id=author_id)
+                for author_id in authors)
+            if len(pending) >= self.batch_size:
+                self.save_follows(pending)
+                pending = []
+        self.save_follows(pending)
+
+    def save_follows(self, follows):
+        with transaction.atomic():
+            Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        self.log(f'Подписки: +{len(follows)}')
@@ -0,0 +1,63 @@
+import os
+import time
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def warm(name):
+    try:
+        thumbnails.generate(name)
+    except Exception as error:
+        return name, error
+    return name, None
+
+
+def close_connections():
+    # Дочерние процессы не должны пользоваться сокетами и дескрипторами
+    # соединений, унаследованными от родителя при fork.
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Готовит миниатюры для уже загруженных картинок постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='число процессов, по умолчанию по числу ядер')
+        parser.add_argument(
+            '--chunk-size', type=int, default=16,
+            help='сколько картинок отдавать процессу за раз')
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').exclude(
+            image__isnull=True).values_list('image', flat=True).iterator()
+        started = time.monotonic()
+        total = failed = 0
+        if options['workers'] > 1:
+            # Пул создаётся до первого запроса: потомки получают
+            # закрытые соединения, а имена родитель читает своим.
+            close_connections()
+            with Pool(options['workers'], close_connections) as pool:
+                results = pool.imap_unordered(
+                    warm, names, options['chunk_size'])
+                total, failed = self.report(results)
+        else:
+            total, failed = self.report(map(warm, names))
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Картинок: {total}, ошибок: {failed}, за {elapsed:.1f} с')
+
+    def report(self, results):
+        total = failed = 0
+        for name, error in results:
+            total += 1
+            if error is not None:
+                failed += 1
+                self.stderr.write(f'{name}: {error}')
+        return total, failed
@@ -0,0 +1,47 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+
+from . import caching
+
+PAGE_KEY = 'page:{}'
+PAGE_CACHE_TIMEOUT = settings.PAGE_CACHE_TIMEOUT
+
+
+class AnonymousPageCacheMiddleware:
+    """Целые страницы для анонимных читателей.
+
+    Кэшируются только ответы, помеченные view метками (render_cached).
+    Вместе с ответом хранятся версии меток на момент рендера; при
+    чтении они сверяются с текущими поколениями, так что запись поста
+    или комментария «вычищает» все страницы с его метками без обхода
+    кэша.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (request.method not in ('GET', 'HEAD') or
+                request.user.is_authenticated):
+            return self.get_response(request)
+        key = PAGE_KEY.format(hashlib.md5(
+            request.build_absolute_uri().encode()).hexdigest())
+        entry = cache.get(key)
+        if entry is not None:
+            tags, response = entry
+            if caching.versions(*tags) == list(tags.values()):
+                response['X-Page-Cache'] = 'hit'
+                # Браузер с актуальной копией получит 304 и без тела.
+                return get_conditional_response(
+                    request, etag=response.get('ETag'), response=response)
+        response = self.get_response(request)
+        tags = getattr(response, 'cache_tags', None)
+        # Страницу с CSRF-токеном или куками отдавать другим нельзя.
+        if (tags and response.status_code == 200 and
+                not response.streaming and not response.cookies and
+                not request.META.get('CSRF_COOKIE_USED')):
+            cache.set(key, (tags, response), PAGE_CACHE_TIMEOUT)
+        return response
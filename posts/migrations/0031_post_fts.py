@@ -0,0 +1,27 @@
+from django.db import migrations
+
+from posts import search
+
+
+def create_index(apps, schema_editor):
+    search.install(schema_editor.connection, rebuild=True)
+
+
+def drop_index(apps, schema_editor):
+    if not search.is_supported(schema_editor.connection):
+        return
+    for suffix in ('ai', 'ad', 'au'):
+        schema_editor.execute(
+            f'DROP TRIGGER IF EXISTS {search.FTS_TABLE}_{suffix}')
+    schema_editor.execute(f'DROP TABLE IF EXISTS {search.FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0030_profile'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
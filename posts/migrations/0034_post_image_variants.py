@@ -0,0 +1,38 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:08
+
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def mark_ready_variants(apps, schema_editor):
+    # Раньше готовность копий проверялась на каждом рендере; здесь
+    # хранилище опрашивается последний раз.
+    Post = apps.get_model('posts', 'Post')
+    ready = []
+    names = Post.objects.exclude(image='').exclude(
+        image__isnull=True).values_list('id', 'image')
+    for post_id, name in names.iterator():
+        stem, _ = os.path.splitext(name)
+        if all(default_storage.exists(f'{stem}.{width}w.webp')
+               for width, height in settings.POST_IMAGE_VARIANTS):
+            ready.append(post_id)
+    Post.objects.filter(id__in=ready).update(image_variants=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0033_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.BooleanField(default=False, editable=False, verbose_name='WebP-копии готовы'),
+        ),
+        migrations.RunPython(mark_ready_variants, migrations.RunPython.noop),
+    ]
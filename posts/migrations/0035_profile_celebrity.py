@@ -0,0 +1,35 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_celebrities(apps, schema_editor):
+    # Раньше популярность определялась по счётчику при каждом чтении.
+    # С какого времени посты не рассылались, неизвестно: celebrity_since
+    # пуст, и при возврате рассылки догоняются последние посты.
+    Profile = apps.get_model('posts', 'Profile')
+    Profile.objects.filter(
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT).update(
+        celebrity=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0034_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='celebrity',
+            field=models.BooleanField(db_index=True, default=False, editable=False, verbose_name='популярный автор'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='celebrity_since',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='популярен с'),
+        ),
+        migrations.RunPython(mark_celebrities, migrations.RunPython.noop),
+    ]
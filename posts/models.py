@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from . import images
+
 User = get_user_model()
 
 
@@ -20,6 +22,8 @@ class Group(models.Model):
 class Post(models.Model):
     text = models.TextField('Текст поста', help_text='Здесь текст поста')
     pub_date = models.DateTimeField('опубликовано', auto_now_add=True)
+    # Версия отрендеренной карточки поста в кэше фрагментов
+    updated_at = models.DateTimeField('изменено', auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='posts', verbose_name='автор')
     group = models.ForeignKey(Group, verbose_name='Группа',
@@ -28,15 +32,36 @@ class Post(models.Model):
                               help_text='Здесь группа')
     image = models.ImageField(upload_to='posts/', blank=True, null=True,
                               verbose_name='фото')
+    comment_count = models.PositiveIntegerField(
+        'комментариев', default=0, editable=False)
+    # WebP-копии картинки готовы: srcset строится без обращений
+    # к хранилищу на каждом рендере
+    image_variants = models.BooleanField(
+        'WebP-копии готовы', default=False, editable=False)
 
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         ordering = ('-pub_date', )
+        # Ленты листаются по (pub_date, id); в составных индексах id
+        # стоит последним, чтобы сортировка шла по индексу целиком.
+        indexes = [
+            models.Index(fields=['pub_date', 'id'],
+                         name='post_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def image_srcset(self):
+        if not (self.image and self.image_variants):
+            return ''
+        return images.srcset(self.image.name)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE,
@@ -50,6 +75,10 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created_idx'),
+        ]
 
 
 class Follow(models.Model):
@@ -65,3 +94,62 @@ class Follow(models.Model):
         verbose_name_plural = 'Подписки'
         constraints = [models.UniqueConstraint(
             fields=['user', 'author'], name='unique_follow')]
+        # Подписчики автора: рассылка ленты и счётчики.
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
+
+
+class Profile(models.Model):
+    """Счётчики подписок пользователя, поддерживаются сигналами Follow."""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name='profile',
+        verbose_name='пользователь')
+    followers_count = models.PositiveIntegerField(
+        'подписчиков', default=0, db_index=True)
+    following_count = models.PositiveIntegerField('подписок', default=0)
+    # Посты популярного автора не рассылаются по лентам, а подмешиваются
+    # при чтении; celebrity_since отмечает, с какого времени.
+    celebrity = models.BooleanField(
+        'популярный автор', default=False, db_index=True, editable=False)
+    celebrity_since = models.DateTimeField(
+        'популярен с', null=True, editable=False)
+
+    class Meta:
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя.
+
+    Заполняется при публикации поста (fan-out on write), поэтому ленте
+    подписок не нужен JOIN подписок с постами. pub_date и author
+    продублированы из поста для сортировки и очистки по индексу.
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='timeline',
+        verbose_name='читатель')
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name='timeline_entries',
+        verbose_name='пост')
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='+',
+        verbose_name='автор')
+    pub_date = models.DateTimeField('опубликовано')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'post'], name='unique_timeline_entry')]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author_idx'),
+        ]
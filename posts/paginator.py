@@ -0,0 +1,153 @@
+import datetime as dt
+
+from django.db.models import Q
+
+EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+MICROSECOND = dt.timedelta(microseconds=1)
+
+
+def encode_cursor(moment, pk):
+    return f'{(moment - EPOCH) // MICROSECOND}_{pk}'
+
+
+def decode_cursor(cursor):
+    """Возвращает (момент, pk) или None для битого курсора."""
+    try:
+        micros, pk = cursor.split('_')
+        return EPOCH + int(micros) * MICROSECOND, int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def keyset_filter(queryset, fields, key, reverse=False):
+    """Строки строго «после» ключа в порядке убывания fields.
+
+    При reverse=True — строки «до» ключа в порядке возрастания,
+    ближайшие к ключу идут первыми.
+    """
+    date_field, pk_field = fields
+    moment, pk = key
+    lookup = 'gt' if reverse else 'lt'
+    condition = (
+        Q(**{f'{date_field}__{lookup}': moment}) |
+        Q(**{date_field: moment, f'{pk_field}__{lookup}': pk})
+    )
+    return queryset.filter(condition)
+
+
+def keyset_order(queryset, fields, reverse=False):
+    prefix = '' if reverse else '-'
+    return queryset.order_by(*(prefix + field for field in fields))
+
+
+def keyset_slice(queryset, fields, key, reverse, limit):
+    queryset = keyset_order(queryset, fields, reverse)
+    if key is not None:
+        queryset = keyset_filter(queryset, fields, key, reverse)
+    return list(queryset[:limit])
+
+
+class CursorPage:
+    """Страница курсорной пагинации.
+
+    Ведёт себя как последовательность объектов. Запрос к базе выполняется
+    лениво, при первом обращении к содержимому страницы, и не требует
+    ни COUNT(*), ни OFFSET.
+    """
+
+    def __init__(self, paginator, after=None, before=None):
+        self.paginator = paginator
+        self.after = after
+        self.before = before
+        self._objects = None
+
+    def _load(self):
+        if self._objects is not None:
+            return
+        paginator = self.paginator
+        limit = paginator.per_page + 1
+        if self.before is not None:
+            objects = paginator.fetch(self.before, True, limit)
+            if len(objects) == limit:
+                self._has_previous = True
+                self._has_next = True
+                self._objects = objects[:paginator.per_page][::-1]
+                return
+            # Дошли до начала ленты: показываем полную первую страницу.
+            self.before = None
+            self.after = None
+        objects = paginator.fetch(self.after, False, limit)
+        self._has_next = len(objects) == limit
+        self._has_previous = self.after is not None
+        self._objects = objects[:paginator.per_page]
+
+    @property
+    def object_list(self):
+        self._load()
+        return self._objects
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __contains__(self, item):
+        return item in self.object_list
+
+    def __repr__(self):
+        return f'<CursorPage after={self.after} before={self.before}>'
+
+    def has_next(self):
+        self._load()
+        return self._has_next
+
+    def has_previous(self):
+        self._load()
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.cursor_for(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous() or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[0])
+
+
+class CursorPaginator:
+    """Пагинация по ключу (дата, id) вместо номера страницы.
+
+    Стоимость выборки любой страницы одинакова: фильтр по ключу последней
+    показанной записи плюс LIMIT. Для выборки используется индекс
+    по (дата, id), счётчик строк не нужен.
+    """
+
+    def __init__(self, object_list, per_page, fields=('pub_date', 'id')):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.fields = fields
+
+    def cursor_for(self, obj):
+        return encode_cursor(*(getattr(obj, field) for field in self.fields))
+
+    def fetch(self, key, reverse, limit):
+        return keyset_slice(self.object_list, self.fields, key, reverse, limit)
+
+    def get_page(self, after=None, before=None):
+        """Страница по курсорам из запроса; битый курсор даёт первую."""
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before else None
+        if before is not None:
+            return CursorPage(self, before=before)
+        return CursorPage(self, after=after)
@@ -0,0 +1,100 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+CREATE_TABLE = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+# Триггеры держат внешний индекс в согласии с posts_post при любой
+# записи, включая bulk_create и update(). SQLite удаляет триггеры
+# вместе с таблицей, когда миграция пересобирает posts_post, поэтому
+# install() повторяется после каждого migrate.
+TRIGGERS = (
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_post '
+    f'BEGIN INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+    'END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_post '
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au '
+    'AFTER UPDATE OF text ON posts_post '
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END',
+)
+SEARCH_LIMIT = settings.SEARCH_LIMIT
+
+
+def is_supported(db_connection=connection):
+    return db_connection.vendor == 'sqlite'
+
+
+def install(db_connection=connection, rebuild=False):
+    if not is_supported(db_connection):
+        return
+    with db_connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        for trigger in TRIGGERS:
+            cursor.execute(trigger)
+        if rebuild:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def to_match(query):
+    """Запрос пользователя в безопасное выражение FTS5.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 в тексте
+    не ломали запрос, и ищется по префиксу.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+
+def ranked_ids(query, group_id=None, author_id=None, limit=SEARCH_LIMIT):
+    """id постов по убыванию релевантности (bm25)."""
+    match = to_match(query)
+    if not match:
+        return []
+    if not is_supported():
+        posts = Post.objects.filter(text__icontains=query)
+        if group_id is not None:
+            posts = posts.filter(group_id=group_id)
+        if author_id is not None:
+            posts = posts.filter(author_id=author_id)
+        return list(posts.values_list('id', flat=True)[:limit])
+    sql = (
+        f'SELECT post.id FROM {FTS_TABLE} '
+        f'JOIN posts_post post ON post.id = {FTS_TABLE}.rowid '
+        f'WHERE {FTS_TABLE} MATCH %s'
+    )
+    params = [match]
+    if group_id is not None:
+        sql += ' AND post.group_id = %s'
+        params.append(group_id)
+    if author_id is not None:
+        sql += ' AND post.author_id = %s'
+        params.append(author_id)
+    sql += ' ORDER BY rank LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def filter_matching(queryset, query):
+    """Посты queryset, подходящие под запрос, без ограничения числа."""
+    match = to_match(query)
+    if not match:
+        return queryset.none()
+    if not is_supported():
+        return queryset.filter(text__icontains=query)
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [match]))
@@ -0,0 +1,124 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, counters, search, timeline
+from .models import Comment, Follow, Post, Profile, User
+
+
+def bump_comment_post(comment):
+    try:
+        bump_post(comment.post)
+    except Post.DoesNotExist:
+        pass
+
+
+def bump_post(post, previous_group_id=None):
+    scopes = caching.post_scopes(post.id, post.author_id, post.group_id)
+    if previous_group_id not in (None, post.group_id):
+        scopes.append(caching.group_scope(previous_group_id))
+    caching.bump(*scopes)
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, raw=False, **kwargs):
+    # При смене группы пост пропадает из ленты прежней группы.
+    if instance.pk and not raw:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        timeline.fan_out(instance)
+    bump_post(instance, getattr(instance, '_previous_group_id', None))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_post(instance)
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.create(user=instance)
+
+
+def follow_added(user_id, author_id):
+    counters.change_follow_counts(user_id, author_id, 1)
+    timeline.backfill(user_id, author_id)
+    timeline.switch_fanout(author_id)
+    caching.bump(
+        caching.author_scope(user_id), caching.author_scope(author_id))
+
+
+def follow_removed(user_id, author_id):
+    counters.change_follow_counts(user_id, author_id, -1)
+    timeline.purge(user_id, author_id)
+    timeline.switch_fanout(author_id)
+    caching.bump(
+        caching.author_scope(user_id), caching.author_scope(author_id))
+
+
+@receiver(pre_save, sender=Follow)
+def follow_changing(sender, instance, raw=False, **kwargs):
+    # В админке у подписки можно сменить и читателя, и автора.
+    if instance.pk and not raw:
+        instance._previous = Follow.objects.filter(
+            pk=instance.pk).values_list('user_id', 'author_id').first()
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.user_id, instance.author_id)
+    if created:
+        follow_added(*current)
+        return
+    previous = getattr(instance, '_previous', None)
+    if previous is not None and previous != current:
+        follow_removed(*previous)
+        follow_added(*current)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_removed(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=Comment)
+def comment_moving(sender, instance, raw=False, **kwargs):
+    # Админка позволяет перенести комментарий к другому посту.
+    if instance.pk and not raw:
+        instance._previous_post_id = Comment.objects.filter(
+            pk=instance.pk).values_list('post_id', flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    bump_comment_post(instance)
+    if created:
+        counters.change_comment_count(instance.post_id, 1)
+        return
+    previous = getattr(instance, '_previous_post_id', None)
+    if previous is not None and previous != instance.post_id:
+        counters.change_comment_count(previous, -1)
+        counters.change_comment_count(instance.post_id, 1)
+        bump_post(Post.objects.get(pk=previous))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comment_count(instance.post_id, -1)
+    bump_comment_post(instance)
+
+
+def restore_search_triggers(sender, using, **kwargs):
+    search.install(connections[using])
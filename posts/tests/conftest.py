@@ -0,0 +1,10 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Откат транзакции после теста не откатывает кэш, а id объектов
+    # в SQLite переиспользуются — без очистки тест увидит чужие фрагменты.
+    cache.clear()
+    yield
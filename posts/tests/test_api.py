@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+PER_PAGE = settings.PER_PAGE
+USERNAME = 'author'
+SLUG = 'test_slug'
+TEXT = 'Тестовый текст'
+API_INDEX = reverse('api:index')
+API_GROUP = reverse('api:group', args=[SLUG])
+API_PROFILE = reverse('api:profile', args=[USERNAME])
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(slug=SLUG, title=TEXT)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text=TEXT)
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.author, text=TEXT)
+        cls.guest_client = Client()
+        cls.post_url = reverse('api:post', args=[cls.post.id])
+        cls.comments_url = reverse('api:comments', args=[cls.post.id])
+
+    def test_feeds(self):
+        for url in (API_INDEX, API_GROUP, API_PROFILE):
+            with self.subTest(url=url):
+                data = self.guest_client.get(url).json()
+                self.assertEqual(data['results'][0], {
+                    'id': self.post.id,
+                    'author': USERNAME,
+                    'group': SLUG,
+                    'text': TEXT,
+                    'pub_date': self.post.pub_date.isoformat(),
+                    'image': None,
+                    'comment_count': 1,
+                })
+
+    def test_post_and_comments(self):
+        self.assertEqual(
+            self.guest_client.get(self.post_url).json()['id'], self.post.id)
+        data = self.guest_client.get(self.comments_url).json()
+        self.assertEqual(data['results'][0]['text'], TEXT)
+        self.assertIsNone(data['next'])
+        missing = reverse('api:post', args=[self.post.id + 100])
+        self.assertEqual(self.guest_client.get(missing).status_code, 404)
+
+    def test_cursor_pagination(self):
+        Post.objects.bulk_create(
+            Post(author=self.author, text=TEXT) for i in range(PER_PAGE))
+        data = self.guest_client.get(API_INDEX).json()
+        self.assertEqual(len(data['results']), PER_PAGE)
+        rest = self.guest_client.get(data['next']).json()
+        self.assertEqual(rest['results'][-1]['id'], self.post.id)
+
+    def test_not_modified_until_feed_changes(self):
+        response = self.guest_client.get(API_PROFILE)
+        etag = response['ETag']
+        with self.assertNumQueries(1):  # автор по username
+            response = self.guest_client.get(
+                API_PROFILE, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        comment = Comment.objects.create(
+            post=self.post, author=self.author, text=TEXT)
+        response = self.guest_client.get(API_PROFILE, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['comment_count'], 2)
+        # Удаление не сдвигает ни одной даты, но меняет ETag
+        etag = response['ETag']
+        comment.delete()
+        response = self.guest_client.get(API_PROFILE, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['comment_count'], 1)
+
+    def test_no_last_modified(self):
+        # По If-Modified-Since нельзя заметить правку или удаление
+        response = self.guest_client.get(API_INDEX)
+        self.assertNotIn('Last-Modified', response)
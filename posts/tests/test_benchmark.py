@@ -0,0 +1,35 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Post, Profile, User
+
+
+class SeedAndBenchmarkTest(TestCase):
+    def test_seed_then_benchmark(self):
+        call_command(
+            'seed', users=30, groups=2, posts=200, comments=300, follows=5,
+            batch_size=50, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        # Первый по рангу автор собирает заметно больше подписчиков
+        top = Profile.objects.order_by('-followers_count').first()
+        self.assertGreater(
+            top.followers_count, Follow.objects.count() / 30)
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command(
+            'bench_views', requests=5, warmup=1, output=path,
+            stdout=StringIO())
+        with open(path) as file:
+            results = json.load(file)['results']
+        self.assertEqual(set(results), {
+            'index', 'follow_index', 'profile', 'post_view', 'add_comment'})
+        self.assertEqual(results['add_comment']['statuses'], {'302': 5})
+        self.assertEqual(Comment.objects.count(), 300)
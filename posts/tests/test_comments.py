@@ -1,4 +1,10 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from posts.models import Group, Post, User, Comment
 
@@ -7,6 +13,7 @@ USERNAME_2 = 'other'
 SLUG = 'test_slug'
 TEXT = 'test_text'
 LOGIN = reverse('login')
+INDEX_URL = reverse('index')
 
 
 class TestComments(TestCase):
@@ -63,3 +70,82 @@ class TestComments(TestCase):
             follow=True)
         self.assertRedirects(response, self.REDIR_LOGIN_TO_ADD_COMM)
         self.assertEqual(comments_count, Comment.objects.count())
+
+
+class TestCommentCount(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.post = Post.objects.create(author=cls.author, text=TEXT)
+        cls.ADD_COMMENT = reverse(
+            'add_comment', args=[USERNAME, cls.post.id])
+        cls.client_author = Client()
+        cls.client_author.force_login(cls.author)
+
+    def comment_count(self):
+        return Post.objects.get(id=self.post.id).comment_count
+
+    def test_count_follows_add_and_delete(self):
+        self.client_author.post(self.ADD_COMMENT, data={'text': '1234'})
+        self.client_author.post(self.ADD_COMMENT, data={'text': '5678'})
+        self.assertEqual(self.comment_count(), 2)
+        Comment.objects.first().delete()
+        self.assertEqual(self.comment_count(), 1)
+        Comment.objects.all().delete()
+        self.assertEqual(self.comment_count(), 0)
+
+    def test_feed_does_not_query_comments(self):
+        Comment.objects.create(post=self.post, author=self.author, text=TEXT)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_author.get(INDEX_URL)
+        self.assertContains(response, 'Комментариев: 1')
+        self.assertFalse(
+            [q for q in queries if 'posts_comment' in q['sql']])
+
+    def test_recount_comments_command(self):
+        Comment.objects.create(post=self.post, author=self.author, text=TEXT)
+        Post.objects.update(comment_count=5)
+        call_command('recount_comments', stdout=StringIO())
+        self.assertEqual(self.comment_count(), 1)
+
+
+class TestCommentPages(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.other = User.objects.create_user(username=USERNAME_2)
+        cls.post = Post.objects.create(author=cls.author, text=TEXT)
+        cls.POST_URL = reverse('post', args=[USERNAME, cls.post.id])
+        cls.client_author = Client()
+        cls.client_author.force_login(cls.author)
+        cls.guest_client = Client()
+
+    @mock.patch('posts.views.COMMENTS_PER_PAGE', 2)
+    def test_comments_paginated_newest_first(self):
+        comments = [
+            Comment.objects.create(
+                post=self.post, author=self.other, text=f'comment {number}')
+            for number in range(5)
+        ]
+        response = self.client_author.get(self.POST_URL)
+        page = response.context['comments']
+        self.assertEqual(list(page), comments[:2:-1])
+        fragment_url = reverse(
+            'post_comments', args=[USERNAME, self.post.id])
+        self.assertContains(
+            response, f'{fragment_url}?after={page.next_cursor}')
+        # Авторы подгружаются тем же запросом, что и комментарии
+        with CaptureQueriesContext(connection) as queries:
+            fragment = self.guest_client.get(
+                fragment_url, {'after': page.next_cursor})
+        self.assertEqual(list(fragment.context['comments']), comments[2:0:-1])
+        self.assertEqual(
+            len([q for q in queries if 'posts_comment' in q['sql']]), 1)
+        self.assertNotContains(fragment, '<html')
+        last = self.guest_client.get(
+            fragment_url,
+            {'after': fragment.context['comments'].next_cursor})
+        self.assertEqual(list(last.context['comments']), comments[:1])
+        self.assertNotContains(last, 'js-older-comments')
@@ -0,0 +1,45 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+SEED = ("from posts.models import Group, Post, User; "
+        "author = User.objects.create(username='author'); "
+        "group = Group.objects.create(slug='group', title='group'); "
+        "Post.objects.create(author=author, group=group, text='text')")
+
+
+class SQLitePragmasTest(TestCase):
+    def test_connection_configured(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+
+class BenchSQLiteTest(SimpleTestCase):
+    def manage(self, *args):
+        # Бенчмарк копирует файл базы и пишет в копию из потоков,
+        # поэтому ему нужна настоящая база на диске, а не тестовая
+        # в памяти.
+        return subprocess.run(
+            [sys.executable, 'manage.py', *args], cwd=settings.BASE_DIR,
+            env={**os.environ, 'DB_NAME': self.database},
+            capture_output=True, text=True, timeout=120, check=True)
+
+    def test_runs_with_groups(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.database = os.path.join(directory, 'bench.sqlite3')
+        self.manage('migrate', '-v0')
+        self.manage('shell', '-c', SEED)
+        output = self.manage(
+            'bench_sqlite', '--seconds', '0.2', '--readers', '1').stdout
+        self.assertIn('delete:', output)
+        self.assertIn('wal:', output)
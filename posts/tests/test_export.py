@@ -0,0 +1,68 @@
+import csv
+import json
+from io import StringIO
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+USERNAME = 'author'
+USERNAME_2 = 'reader'
+SLUG = 'test_slug'
+TEXT = 'Тестовый текст'
+EXPORT_URL = reverse('export', args=[USERNAME])
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username=USERNAME_2)
+        cls.group = Group.objects.create(slug=SLUG)
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'{TEXT} {i}')
+            for i in range(5))
+        cls.post = Post.objects.filter(author=cls.author).first()
+        Comment.objects.create(post=cls.post, author=cls.author, text=TEXT)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    # Маленькие пачки, чтобы выгрузка прошла через несколько запросов
+    @mock.patch('posts.export.CHUNK_SIZE', 2)
+    def test_jsonl_export_in_chunks(self):
+        response = self.author_client.get(EXPORT_URL)
+        records = [
+            json.loads(line)
+            for line in self.content(response).splitlines()]
+        posts = [record for record in records if record['type'] == 'post']
+        self.assertEqual(
+            [post['id'] for post in posts],
+            list(Post.objects.order_by('pub_date', 'id').values_list(
+                'id', flat=True)))
+        self.assertEqual(posts[0]['group'], SLUG)
+        self.assertEqual(records[-1]['type'], 'comment')
+        self.assertEqual(records[-1]['post'], self.post.id)
+
+    def test_csv_export(self):
+        response = self.author_client.get(EXPORT_URL, {'format': 'csv'})
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(self.content(response))))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[-1]['text'], TEXT)
+
+    def test_only_owner_and_staff_export(self):
+        self.assertEqual(
+            self.reader_client.get(EXPORT_URL).status_code, 403)
+        self.assertEqual(Client().get(EXPORT_URL).status_code, 302)
+        self.reader.is_staff = True
+        self.reader.save()
+        self.assertEqual(
+            self.reader_client.get(EXPORT_URL).status_code, 200)
@@ -1,6 +1,9 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import Client, TestCase
 from django.urls import reverse
-from posts.models import Follow, Post, User
+from posts.models import Follow, Post, Profile, User
 
 USERNAME_1 = 'TestUser_01'
 USERNAME_2 = 'TestUser_02'
@@ -70,3 +73,53 @@ class FollowTest(TestCase):
             FOLLOW_INDEX)
         self.assertNotIn(self.post_not_follower,
                          response_not_follower.context['page'])
+
+
+class FollowCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_follower = User.objects.create(username=USERNAME_1)
+        cls.user_author = User.objects.create(username=USERNAME_2)
+        cls.auth_client_follower = Client()
+        cls.auth_client_follower.force_login(cls.user_follower)
+
+    def counts(self, user):
+        profile = Profile.objects.get(user=user)
+        return profile.followers_count, profile.following_count
+
+    def test_follow_and_unfollow_update_counters(self):
+        self.auth_client_follower.get(PROFILE_FOLLOW)
+        self.auth_client_follower.get(PROFILE_FOLLOW)
+        self.assertEqual(self.counts(self.user_author), (1, 0))
+        self.assertEqual(self.counts(self.user_follower), (0, 1))
+        self.auth_client_follower.get(PROFILE_UNFOLLOW)
+        self.assertEqual(self.counts(self.user_author), (0, 0))
+        self.assertEqual(self.counts(self.user_follower), (0, 0))
+
+    def test_changed_follow_moves_counters(self):
+        """Смена автора подписки (как в админке) переносит счётчики"""
+        other = User.objects.create(username='other')
+        follow = Follow.objects.create(
+            user=self.user_follower, author=self.user_author)
+        follow.author = other
+        follow.save()
+        self.assertEqual(self.counts(self.user_author), (0, 0))
+        self.assertEqual(self.counts(other), (1, 0))
+        self.assertEqual(self.counts(self.user_follower), (0, 1))
+
+    def test_profile_page_shows_counters(self):
+        Follow.objects.create(
+            user=self.user_follower, author=self.user_author)
+        response = self.auth_client_follower.get(
+            reverse('profile', args=[USERNAME_2]))
+        self.assertContains(response, 'Подписчиков: 1')
+
+    def test_recount_follows_command(self):
+        Follow.objects.create(
+            user=self.user_follower, author=self.user_author)
+        Profile.objects.update(followers_count=7, following_count=7)
+        Profile.objects.filter(user=self.user_follower).delete()
+        call_command('recount_follows', stdout=StringIO())
+        self.assertEqual(self.counts(self.user_author), (1, 0))
+        self.assertEqual(self.counts(self.user_follower), (0, 1))
@@ -0,0 +1,116 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import caching, images, thumbnails
+from posts.forms import PostForm
+from posts.models import Post, User
+
+USERNAME = 'author'
+INDEX_URL = reverse('index')
+
+
+def make_image(size, exif=False, image_format='JPEG'):
+    image = Image.new('RGB', size, 'red')
+    output = BytesIO()
+    options = {}
+    if exif:
+        data = Image.Exif()
+        data[0x010F] = 'Camera maker'
+        options['exif'] = data.tobytes()
+    if image_format == 'MPO':
+        # Как у камер телефонов: снимок и дополнительный кадр.
+        options.update(save_all=True, append_images=[image.copy()])
+    image.save(output, image_format, **options)
+    return SimpleUploadedFile(
+        'photo.jpg', output.getvalue(), content_type='image/jpeg')
+
+
+class ImageIngestTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        cls.author = User.objects.create_user(username=USERNAME)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def clean_image(self, uploaded):
+        form = PostForm(data={'text': 'text'}, files={'image': uploaded})
+        self.assertTrue(form.is_valid(), form.errors)
+        return Image.open(form.cleaned_data['image'])
+
+    @mock.patch('posts.images.MAX_SIDE', 100)
+    def test_large_image_downscaled(self):
+        image = self.clean_image(make_image((400, 200)))
+        self.assertEqual(image.size, (100, 50))
+
+    @mock.patch('posts.images.MAX_SIDE', 100)
+    def test_saved_format(self):
+        for source, expected in (('JPEG', 'JPEG'), ('MPO', 'JPEG'),
+                                 ('BMP', 'JPEG'), ('PNG', 'PNG'),
+                                 ('GIF', 'PNG')):
+            with self.subTest(source=source):
+                uploaded = make_image((400, 200), image_format=source)
+                self.assertEqual(Image.open(uploaded).format, source)
+                uploaded.seek(0)
+                self.assertEqual(
+                    self.clean_image(uploaded).format, expected)
+
+    def test_exif_stripped(self):
+        image = self.clean_image(make_image((40, 20), exif=True))
+        self.assertFalse(image.getexif())
+
+    @mock.patch('posts.images.MAX_PIXELS', 100)
+    def test_too_many_pixels_rejected(self):
+        form = PostForm(
+            data={'text': 'text'}, files={'image': make_image((40, 20))})
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    def test_webp_variants_in_feed(self):
+        post = Post.objects.create(
+            author=self.author, text='text', image=make_image((1200, 800)))
+        response = Client().get(INDEX_URL)
+        self.assertNotContains(response, 'type="image/webp"')
+        # Как после загрузки: копии готовятся в фоне, когда карточка
+        # без них уже в кэше
+        thumbnails.generate_in_background(
+            post.image.name, caching.post_scopes(post.id, self.author.id))
+        for width, height in settings.POST_IMAGE_VARIANTS:
+            with self.subTest(width=width):
+                variant = Image.open(
+                    f'{self.media_root}/'
+                    f'{images.variant_name(post.image.name, width)}')
+                self.assertEqual(variant.format, 'WEBP')
+                self.assertEqual(variant.size, (width, height))
+        # Готовность копий записана в посте, хранилище не опрашивается
+        with mock.patch.object(
+                default_storage, 'exists', side_effect=AssertionError):
+            response = Client().get(INDEX_URL)
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, '480w')
+
+    def test_new_image_resets_variants(self):
+        post = Post.objects.create(
+            author=self.author, text='text', image=make_image((40, 20)),
+            image_variants=True)
+        form = PostForm(
+            data={'text': 'text'}, files={'image': make_image((20, 40))},
+            instance=post)
+        self.assertTrue(form.is_valid())
+        self.assertFalse(form.save().image_variants)
@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import caching, export
+from posts.models import (Comment, Follow, Group, Post, Profile,
+                          TimelineEntry, User)
+
+USERNAME = 'author'
+USERNAME_2 = 'reader'
+SLUG = 'test_slug'
+PUB_DATE = '2019-05-01T12:00:00+00:00'
+
+
+class ImportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username=USERNAME_2)
+        cls.group = Group.objects.create(slug=SLUG)
+
+    def write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def import_file(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'import_posts', path, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_jsonl_import(self):
+        records = [
+            {'type': 'post', 'id': 500, 'author': USERNAME, 'group': SLUG,
+             'text': 'Архивный пост', 'pub_date': PUB_DATE},
+            {'type': 'post', 'author': 'ghost', 'text': 'чужой'},
+            {'type': 'comment', 'post': 500, 'author': USERNAME_2,
+             'text': 'комментарий', 'created': PUB_DATE},
+            {'type': 'comment', 'post': 999, 'author': USERNAME_2,
+             'text': 'к несуществующему посту'},
+            {'type': 'follow', 'user': USERNAME_2, 'author': USERNAME},
+        ]
+        path = self.write('.jsonl', '\n'.join(map(json.dumps, records)))
+        stdout, stderr = self.import_file(path, batch_size=2)
+        self.assertIn('пропущено: 2', stdout)
+        self.assertIn('ghost', stderr)
+        post = Post.objects.get(id=500)
+        self.assertEqual(post.pub_date.isoformat(), PUB_DATE)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(
+            Comment.objects.get(post=post).created.isoformat(), PUB_DATE)
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author).exists())
+        self.assertEqual(
+            Profile.objects.get(user=self.author).followers_count, 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+
+    def test_csv_import(self):
+        path = self.write(
+            '.csv', f'author,text\n{USERNAME},первый\n{USERNAME},второй\n')
+        self.import_file(path, type='post')
+        self.assertEqual(
+            Post.objects.filter(author=self.author).count(), 2)
+        # auto_now_add снова работает после загрузки
+        self.assertIsNotNone(
+            Post.objects.create(author=self.author, text='new').pub_date)
+
+    def test_csv_export_round_trip(self):
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='пост')
+        Comment.objects.create(post=post, author=self.author, text='ответ')
+        path = self.write('.csv', ''.join(export.as_csv(self.author)))
+        Post.objects.all().delete()
+        # Тип каждой строки берётся из колонки type, --type не нужен
+        self.import_file(path)
+        post = Post.objects.get(id=post.id)
+        self.assertEqual(post.text, 'пост')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.comments.get().text, 'ответ')
+
+    def test_reimport_skips_existing_ids(self):
+        post = Post.objects.create(author=self.author, text='пост')
+        Comment.objects.create(post=post, author=self.author, text='ответ')
+        path = self.write('.jsonl', ''.join(export.as_jsonl(self.author)))
+        new = {'type': 'post', 'author': USERNAME, 'text': 'новый'}
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(new) + '\n')
+        stdout, stderr = self.import_file(path)
+        self.assertIn('Постов: 1, комментариев: 0', stdout)
+        self.assertIn('пропущено: 2', stdout)
+        self.assertIn(f'post id={post.id}', stderr)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_written_batches_fixed_up_after_failure(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        path = self.write('.jsonl', json.dumps(
+            {'type': 'post', 'author': USERNAME, 'text': 'первый'})
+            + '\n{broken\n')
+        with self.assertRaises(ValueError):
+            self.import_file(path, batch_size=1)
+        post = Post.objects.get(author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+
+    def test_fix_up_limited_to_imported_rows(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        # Чужой счётчик расходится с таблицей, но загрузка его не трогает.
+        Profile.objects.filter(user=self.reader).update(followers_count=42)
+        path = self.write('.jsonl', json.dumps(
+            {'type': 'post', 'author': USERNAME, 'text': 'новый'}))
+        self.import_file(path)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post__text='новый').exists())
+        self.assertEqual(
+            Profile.objects.get(user=self.reader).followers_count, 42)
+
+    def test_existing_follows_not_counted(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        path = self.write('.jsonl', json.dumps(
+            {'type': 'follow', 'user': USERNAME_2, 'author': USERNAME}))
+        stdout, _ = self.import_file(path)
+        self.assertIn('подписок: 0', stdout)
+
+    def test_import_bumps_generations_instead_of_clearing_cache(self):
+        scopes = (caching.INDEX, caching.author_scope(self.author.id),
+                  caching.group_scope(self.group.id))
+        before = caching.versions(*scopes)
+        cache.set('unrelated', 1)
+        path = self.write('.jsonl', json.dumps(
+            {'type': 'post', 'author': USERNAME, 'group': SLUG,
+             'text': 'новый'}))
+        self.import_file(path)
+        for scope, old, new in zip(scopes, before, caching.versions(*scopes)):
+            with self.subTest(scope):
+                self.assertNotEqual(old, new)
+        self.assertEqual(cache.get('unrelated'), 1)
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+
+FILE_NAME = 'posts/file.bin'
+FILE_URL = f'/media/{FILE_NAME}'
+CONTENT = bytes(range(100))
+
+
+class MediaServeTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        os.makedirs(os.path.join(cls.media_root, 'posts'))
+        with open(os.path.join(cls.media_root, FILE_NAME), 'wb') as file:
+            file.write(CONTENT)
+        cls.guest_client = Client()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_full_file_with_validators(self):
+        response = self.guest_client.get(FILE_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertFalse(response['ETag'].startswith('W/'))
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_not_modified(self):
+        response = self.guest_client.get(FILE_URL)
+        for headers in (
+            {'HTTP_IF_NONE_MATCH': response['ETag']},
+            {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']},
+        ):
+            with self.subTest(headers=headers):
+                self.assertEqual(
+                    self.guest_client.get(FILE_URL, **headers).status_code,
+                    304)
+
+    def test_ranges(self):
+        cases = (
+            ('bytes=10-19', 'bytes 10-19/100', CONTENT[10:20]),
+            ('bytes=90-', 'bytes 90-99/100', CONTENT[90:]),
+            ('bytes=-5', 'bytes 95-99/100', CONTENT[95:]),
+        )
+        for header, content_range, content in cases:
+            with self.subTest(header=header):
+                response = self.guest_client.get(FILE_URL, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(
+                    b''.join(response.streaming_content), content)
+
+    def test_unsatisfiable_range(self):
+        response = self.guest_client.get(FILE_URL, HTTP_RANGE='bytes=200-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_stale_if_range_sends_whole_file(self):
+        response = self.guest_client.get(
+            FILE_URL, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_and_outside_files(self):
+        for url in ('/media/posts/missing.bin', '/media/../settings.py',
+                    '/media/posts/'):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.guest_client.get(url).status_code, 404)
+
+    def test_offload_to_front_proxy(self):
+        with self.settings(MEDIA_ACCEL='x-accel-redirect'):
+            response = self.guest_client.get(FILE_URL)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            settings.MEDIA_ACCEL_PREFIX + FILE_NAME)
+        self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_ACCEL='x-sendfile'):
+            response = self.guest_client.get(FILE_URL)
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(self.media_root, FILE_NAME))
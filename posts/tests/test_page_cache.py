@@ -0,0 +1,69 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+USERNAME = 'author'
+SLUG = 'test_slug'
+TEXT = 'test_text'
+INDEX_URL = reverse('index')
+GROUP_SLUG_URL = reverse('group_slug', args=[SLUG])
+PROFILE = reverse('profile', args=[USERNAME])
+LOGIN = reverse('login')
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(slug=SLUG)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text=TEXT)
+        cls.POST_URL = reverse('post', args=[USERNAME, cls.post.id])
+        cls.POST_EDIT_URL = reverse('post_edit', args=[USERNAME, cls.post.id])
+        cls.ADD_COMMENT = reverse('add_comment', args=[USERNAME, cls.post.id])
+        cls.guest_client = Client()
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.author)
+
+    def test_repeated_anonymous_request_skips_views(self):
+        for url in (INDEX_URL, GROUP_SLUG_URL, PROFILE, self.POST_URL):
+            with self.subTest(url):
+                self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'hit')
+
+    def test_authorized_user_not_served_from_page_cache(self):
+        self.guest_client.get(INDEX_URL)
+        response = self.authorized_client.get(INDEX_URL)
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertContains(response, 'Новая запись')
+
+    def test_untagged_pages_not_cached(self):
+        self.guest_client.get(LOGIN)
+        self.assertFalse(
+            self.guest_client.get(LOGIN).has_header('X-Page-Cache'))
+
+    def test_writes_purge_tagged_pages(self):
+        for url in (INDEX_URL, GROUP_SLUG_URL, PROFILE, self.POST_URL):
+            self.guest_client.get(url)
+        self.authorized_client.post(
+            self.POST_EDIT_URL, data={'text': 'EDITED', 'group': ''})
+        for url in (INDEX_URL, GROUP_SLUG_URL, PROFILE, self.POST_URL):
+            with self.subTest(url):
+                response = self.guest_client.get(url)
+                self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertNotContains(self.guest_client.get(GROUP_SLUG_URL), TEXT)
+        self.authorized_client.post(
+            self.ADD_COMMENT, data={'text': 'NEW_COMMENT'})
+        self.assertContains(
+            self.guest_client.get(self.POST_URL), 'NEW_COMMENT')
+
+    def test_cached_page_answers_not_modified(self):
+        etag = self.guest_client.get(INDEX_URL)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                INDEX_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
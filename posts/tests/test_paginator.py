@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post, User
+
+PER_PAGE = settings.PER_PAGE
+USERNAME = 'author'
+TEXT = 'test_text'
+INDEX_URL = reverse('index')
+PROFILE = reverse('profile', args=[USERNAME])
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        Post.objects.bulk_create([
+            Post(author=cls.author, text=f'{TEXT}_{i}')
+            for i in range(PER_PAGE * 2 + 3)
+        ])
+        cls.guest_client = Client()
+
+    def walk(self, url):
+        pages = []
+        query = ''
+        while True:
+            page = self.guest_client.get(url + query).context['page']
+            pages.append(list(page))
+            if not page.has_next():
+                return pages
+            query = f'?after={page.next_cursor}'
+
+    def test_pages_cover_feed_in_order(self):
+        """Страницы по курсору покрывают ленту без пропусков и повторов"""
+        for url in (INDEX_URL, PROFILE):
+            with self.subTest(url):
+                pages = self.walk(url)
+                self.assertEqual(
+                    [len(page) for page in pages], [PER_PAGE, PER_PAGE, 3])
+                posts = [post for page in pages for post in page]
+                self.assertEqual(
+                    posts, list(Post.objects.order_by('-pub_date', '-id')))
+
+    def test_previous_page(self):
+        first = self.guest_client.get(INDEX_URL).context['page']
+        second = self.guest_client.get(
+            f'{INDEX_URL}?after={first.next_cursor}').context['page']
+        self.assertTrue(second.has_previous())
+        back = self.guest_client.get(
+            f'{INDEX_URL}?before={second.previous_cursor}').context['page']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_no_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(f'{INDEX_URL}?after=999999999999999_1')
+        self.assertFalse(
+            [q for q in queries if 'COUNT(' in q['sql'].upper()])
+
+    def test_broken_cursor_gives_first_page(self):
+        page = self.guest_client.get(
+            f'{INDEX_URL}?after=broken').context['page']
+        self.assertEqual(len(page), PER_PAGE)
+        self.assertFalse(page.has_previous())
+
+    def test_legacy_page_links(self):
+        """Старые ссылки ?page=N продолжают работать"""
+        page = self.guest_client.get(f'{INDEX_URL}?page=3').context['page']
+        self.assertEqual(page.number, 3)
+        self.assertEqual(len(page), 3)
@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+PER_PAGE = settings.PER_PAGE
+USERNAME = 'author'
+USERNAME_2 = 'reader'
+SLUG = 'test_slug'
+TEXT = 'test_text'
+INDEX_URL = reverse('index')
+FOLLOW_INDEX = reverse('follow_index')
+GROUP_SLUG_URL = reverse('group_slug', args=[SLUG])
+PROFILE = reverse('profile', args=[USERNAME])
+
+
+class QueryBudgetTest(TestCase):
+    """Число запросов на страницу не зависит от числа постов и комментариев.
+
+    Бюджет включает запросы сессии и пользователя для авторизованного
+    клиента. Если тест упал — во view или шаблон вернулся N+1.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username=USERNAME_2)
+        cls.group = Group.objects.create(slug=SLUG, title=TEXT)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.guest_client = Client()
+        cls.client_reader = Client()
+        cls.client_reader.force_login(cls.reader)
+
+    def create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                author=self.author, group=self.group, text=TEXT)
+            Comment.objects.create(
+                post=post, author=self.reader, text=TEXT)
+        return post
+
+    def assert_budget(self, budgets):
+        for url, client, queries in budgets:
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    client.get(url)
+
+    def budgets(self, post):
+        post_url = reverse('post', args=[USERNAME, post.id])
+        return (
+            (INDEX_URL, self.guest_client, 1),
+            (GROUP_SLUG_URL, self.guest_client, 2),
+            (PROFILE, self.guest_client, 2),
+            (post_url, self.guest_client, 2),
+            (INDEX_URL, self.client_reader, 3),
+            (FOLLOW_INDEX, self.client_reader, 3),
+            (PROFILE, self.client_reader, 5),
+            # Список комментариев общий для всех и уже лежит в кэше
+            (post_url, self.client_reader, 4),
+        )
+
+    def test_budget_with_one_post(self):
+        post = self.create_posts(1)
+        self.assert_budget(self.budgets(post))
+
+    def test_budget_with_full_page(self):
+        post = self.create_posts(PER_PAGE * 2)
+        for i in range(PER_PAGE):
+            Comment.objects.create(post=post, author=self.author, text=TEXT)
+        self.assert_budget(self.budgets(post))
+
+
+class QueryPlanTest(TestCase):
+    """Запросы лент идут по составным индексам, а не перебором таблицы."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username=USERNAME_2)
+        cls.group = Group.objects.create(slug=SLUG, title=TEXT)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text=TEXT)
+        Comment.objects.create(post=cls.post, author=cls.reader, text=TEXT)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.guest_client = Client()
+
+    def plans(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.guest_client.get(url)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans[query['sql']] = ' | '.join(
+                    row[-1] for row in cursor.fetchall())
+        return plans
+
+    def assert_uses(self, url, *indexes):
+        plans = ' | '.join(self.plans(url).values())
+        for index in indexes:
+            self.assertRegex(plans, rf'USING (COVERING )?INDEX {index}\b')
+        self.assertNotIn('TEMP B-TREE', plans)
+
+    def test_views_use_indexes(self):
+        post_url = reverse('post', args=[USERNAME, self.post.id])
+        cases = (
+            (INDEX_URL, ['post_date_idx']),
+            (GROUP_SLUG_URL, ['post_group_date_idx']),
+            (PROFILE, ['post_author_date_idx']),
+            (post_url, ['comment_post_created_idx']),
+        )
+        for url, indexes in cases:
+            with self.subTest(url=url):
+                self.assert_uses(url, *indexes)
+
+    def test_followers_use_index(self):
+        plan = Follow.objects.filter(author=self.author).values_list(
+            'user_id', flat=True).explain()
+        self.assertIn('follow_author_user_idx', plan)
@@ -0,0 +1,62 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+USERNAME = 'author'
+USERNAME_2 = 'other'
+SLUG = 'test_slug'
+SEARCH_URL = reverse('search')
+ADMIN_SEARCH = reverse('admin:posts_post_changelist')
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.other = User.objects.create_user(username=USERNAME_2)
+        cls.group = Group.objects.create(slug=SLUG)
+        cls.post_rare = Post.objects.create(
+            author=cls.author, text='котики и собаки')
+        cls.post_often = Post.objects.create(
+            author=cls.other, group=cls.group,
+            text='котики, котики, снова Котики')
+        cls.guest_client = Client()
+
+    def search(self, **params):
+        return list(self.guest_client.get(
+            SEARCH_URL, params).context['page'])
+
+    def test_results_ranked(self):
+        self.assertEqual(
+            self.search(q='котики'), [self.post_often, self.post_rare])
+
+    def test_filters(self):
+        self.assertEqual(
+            self.search(q='котики', group=SLUG), [self.post_often])
+        self.assertEqual(
+            self.search(q='котики', author=USERNAME), [self.post_rare])
+
+    def test_prefix_and_operators(self):
+        self.assertEqual(self.search(q='собак'), [self.post_rare])
+        self.assertEqual(self.search(q='"собаки" ('), [self.post_rare])
+        self.assertEqual(self.search(q='***'), [])
+
+    def test_index_follows_writes(self):
+        post = Post.objects.get(id=self.post_rare.id)
+        post.text = 'попугаи'
+        post.save()
+        self.assertEqual(self.search(q='собаки'), [])
+        self.assertEqual(self.search(q='попугаи'), [post])
+        post.delete()
+        self.assertEqual(self.search(q='попугаи'), [])
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(ADMIN_SEARCH, {'q': 'собак'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post_rare])
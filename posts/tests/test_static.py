@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+
+CSS_NAME = 'base.css'
+CSS = 'body { background: url("logo.png"); }\n' * 50
+
+
+class StaticPipelineTest(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.target = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        with open(os.path.join(self.source, CSS_NAME), 'w') as file:
+            file.write(CSS)
+        with open(os.path.join(self.source, 'logo.png'), 'wb') as file:
+            file.write(b'png')
+
+    def tearDown(self):
+        shutil.rmtree(self.source, ignore_errors=True)
+        shutil.rmtree(self.target, ignore_errors=True)
+
+    def test_collected_files_hashed_and_compressed(self):
+        with override_settings(
+            STATICFILES_DIRS=[self.source], STATIC_ROOT=self.target,
+            INSTALLED_APPS=['django.contrib.staticfiles'],
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            url = static(CSS_NAME)
+            hashed = staticfiles_storage.stored_name(CSS_NAME)
+        self.assertNotEqual(hashed, CSS_NAME)
+        self.assertEqual(url, settings.STATIC_URL + hashed)
+        self.assertTrue(
+            os.path.exists(os.path.join(self.target, hashed + '.gz')))
+
+    def test_missing_manifest_falls_back_to_plain_name(self):
+        with override_settings(STATIC_ROOT=self.target):
+            self.assertEqual(
+                static(CSS_NAME), settings.STATIC_URL + CSS_NAME)
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+USERNAME = 'author'
+NEW_POST = reverse('new_post')
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def run_now(function, *args):
+    return function(*args)
+
+
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(
+            os.path.join(self.media_root, 'cache'), ignore_errors=True)
+
+    def thumbnail_files(self):
+        return [
+            name for root, dirs, files in os.walk(
+                os.path.join(self.media_root, 'cache'))
+            for name in files
+        ]
+
+    @mock.patch('posts.thumbnails.executor.submit', run_now)
+    @mock.patch('posts.thumbnails.transaction.on_commit', run_now)
+    def test_new_post_pregenerates_thumbnails(self):
+        self.authorized_client.post(NEW_POST, data={
+            'text': 'text',
+            'image': SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        })
+        self.assertEqual(
+            len(self.thumbnail_files()), len(settings.POST_THUMBNAILS))
+
+    def test_warm_thumbnails_command(self):
+        Post.objects.create(
+            author=self.author, text='text',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'))
+        stdout = StringIO()
+        call_command('warm_thumbnails', workers=1, stdout=stdout)
+        self.assertIn('Картинок: 1, ошибок: 0', stdout.getvalue())
+        self.assertEqual(
+            len(self.thumbnail_files()), len(settings.POST_THUMBNAILS))
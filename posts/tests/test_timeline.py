@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User
+
+PER_PAGE = settings.PER_PAGE
+USERNAME_1 = 'reader'
+USERNAME_2 = 'author'
+USERNAME_3 = 'celebrity'
+TEXT = 'test_text'
+FOLLOW_INDEX = reverse('follow_index')
+PROFILE_FOLLOW = reverse('profile_follow', args=[USERNAME_2])
+PROFILE_UNFOLLOW = reverse('profile_unfollow', args=[USERNAME_2])
+
+
+def run_now(function, *args):
+    return function(*args)
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username=USERNAME_1)
+        cls.author = User.objects.create_user(username=USERNAME_2)
+        cls.celebrity = User.objects.create_user(username=USERNAME_3)
+        cls.client_reader = Client()
+        cls.client_reader.force_login(cls.reader)
+
+    def setUp(self):
+        cache.delete(timeline.CELEBRITIES_KEY)
+
+    def test_new_post_fans_out_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text=TEXT)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+
+    def test_follow_backfills_and_unfollow_purges(self):
+        post = Post.objects.create(author=self.author, text=TEXT)
+        self.client_reader.get(PROFILE_FOLLOW)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.client_reader.get(PROFILE_UNFOLLOW)
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader).exists())
+        response = self.client_reader.get(FOLLOW_INDEX)
+        self.assertNotIn(post, response.context['page'])
+
+    @mock.patch('posts.timeline.FANOUT_LIMIT', 2)
+    @mock.patch('posts.timeline.FANOUT_RESUME_LIMIT', 1)
+    @mock.patch('posts.timeline.transaction.on_commit', run_now)
+    @mock.patch('posts.timeline.executor.submit')
+    def test_posts_fanned_out_when_author_stops_being_celebrity(
+            self, submit):
+        fan = User.objects.create_user(username='fan')
+        earlier = Post.objects.create(author=self.celebrity, text=TEXT)
+        for user in (self.reader, self.author, fan):
+            Follow.objects.create(user=user, author=self.celebrity)
+        self.assertIn(self.celebrity.id, timeline.celebrities())
+        post = Post.objects.create(author=self.celebrity, text=TEXT)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        # Между порогами автор остаётся популярным.
+        Follow.objects.filter(user=fan).delete()
+        submit.assert_not_called()
+        self.assertIn(self.celebrity.id, timeline.celebrities())
+        # Ниже нижнего порога догонка уходит в фон, а не в запрос.
+        TimelineEntry.objects.filter(post=earlier).delete()
+        Follow.objects.filter(user=self.author).delete()
+        submit.assert_called_once_with(
+            timeline.catch_up_in_background, self.celebrity.id)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        timeline.catch_up(self.celebrity.id)
+        self.assertNotIn(self.celebrity.id, timeline.celebrities())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        # Посты до популярности уже были разосланы и не догоняются.
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=earlier).exists())
+        response = self.client_reader.get(FOLLOW_INDEX)
+        self.assertIn(post, response.context['page'])
+
+    @mock.patch('posts.timeline.FANOUT_LIMIT', 0)
+    def test_celebrity_posts_read_on_demand(self):
+        """Посты популярных авторов не рассылаются, а читаются из постов"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.celebrity)
+        cache.delete(timeline.CELEBRITIES_KEY)
+        posts = []
+        for i in range(PER_PAGE):
+            posts.append(Post.objects.create(author=self.author, text=TEXT))
+            posts.append(
+                Post.objects.create(author=self.celebrity, text=TEXT))
+        self.assertFalse(TimelineEntry.objects.filter(
+            author=self.celebrity).exists())
+        first = self.client_reader.get(FOLLOW_INDEX).context['page']
+        second = self.client_reader.get(
+            f'{FOLLOW_INDEX}?after={first.next_cursor}').context['page']
+        self.assertEqual(list(first) + list(second), posts[::-1])
+
+    def test_rebuild_timelines(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text=TEXT)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=mock.Mock())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
@@ -5,7 +5,8 @@ from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase
 from django.urls import reverse
-from posts.models import Group, Post, User, Follow
+from posts import caching
+from posts.models import Comment, Group, Post, User, Follow
 
 PER_PAGE = settings.PER_PAGE
 USERNAME = 'author'
@@ -125,16 +126,105 @@ class CacheTest(TestCase):
     def setUpClass(cls):
         super().setUpClass()
         cls.guest_client = Client()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(slug=SLUG)
+        cls.group_2 = Group.objects.create(slug=SLUG_2)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text=TEXT)
 
     def test_cache(self):
         response = self.guest_client.get(INDEX_URL)
-        Post.objects.create(
-            author=User.objects.create_user(
-                username='new_author'),
-            text='NEW_TEXT',
-            )
+        # update() не шлёт сигналов, поэтому поколение ленты не меняется
+        Post.objects.filter(id=self.post.id).update(text='NEW_TEXT')
         response2 = self.guest_client.get(INDEX_URL)
         self.assertEqual(response.content, response2.content)
         cache.clear()
         response3 = self.guest_client.get(INDEX_URL)
         self.assertNotEqual(response.content, response3.content)
+
+    def test_new_post_invalidates_its_feeds(self):
+        urls = (INDEX_URL, GROUP_SLUG_URL, GROUP_SLUG_2_URL, PROFILE)
+        for url in urls:
+            self.guest_client.get(url)
+        Post.objects.create(
+            author=self.author, group=self.group, text='NEW_TEXT')
+        for url in (INDEX_URL, GROUP_SLUG_URL, PROFILE):
+            with self.subTest(url):
+                self.assertContains(self.guest_client.get(url), 'NEW_TEXT')
+        # Страница другой группы осталась в кэше целиком
+        with self.assertNumQueries(0):
+            self.guest_client.get(GROUP_SLUG_2_URL)
+
+    def test_comment_invalidates_post_page(self):
+        post_url = reverse('post', args=[USERNAME, self.post.id])
+        self.guest_client.get(post_url)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='NEW_COMMENT')
+        self.assertContains(self.guest_client.get(post_url), 'NEW_COMMENT')
+
+    def test_post_card_cached_without_reader_buttons(self):
+        post_edit = reverse('post_edit', args=[USERNAME, self.post.id])
+        author_client = Client()
+        author_client.force_login(self.author)
+        reader_client = Client()
+        reader_client.force_login(
+            User.objects.create_user(username=USERNAME_2))
+        self.assertContains(author_client.get(INDEX_URL), post_edit)
+        # Страница ленты рендерится заново, карточка поста — из кэша
+        Post.objects.filter(id=self.post.id).update(text='NEW_TEXT')
+        caching.bump(caching.INDEX)
+        response = reader_client.get(INDEX_URL)
+        self.assertContains(response, TEXT)
+        self.assertNotContains(response, 'NEW_TEXT')
+        self.assertNotContains(response, post_edit)
+        self.assertContains(response, 'Добавить комментарий')
+        self.assertNotContains(
+            self.guest_client.get(INDEX_URL), 'Добавить комментарий')
+        # Сохранение поста меняет updated_at, а с ним и ключ карточки
+        post = Post.objects.get(id=self.post.id)
+        post.save()
+        self.assertContains(reader_client.get(INDEX_URL), 'NEW_TEXT')
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username=USERNAME_2)
+        cls.group = Group.objects.create(slug=SLUG)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text=TEXT)
+        cls.post_url = reverse('post', args=[USERNAME, cls.post.id])
+        cls.guest_client = Client()
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def test_unchanged_pages_not_modified(self):
+        for client in (self.guest_client, self.reader_client):
+            for url in (PROFILE, GROUP_SLUG_URL, self.post_url):
+                with self.subTest(url=url, user=client):
+                    # Первый ответ с формой выдаёт CSRF-куку, и она
+                    # входит в ETag следующих
+                    client.get(url)
+                    etag = client.get(url)['ETag']
+                    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 304)
+                    self.assertEqual(response['ETag'], etag)
+
+    def test_etag_differs_per_reader(self):
+        self.assertNotEqual(
+            self.guest_client.get(PROFILE)['ETag'],
+            self.reader_client.get(PROFILE)['ETag'])
+
+    def test_writes_change_etag(self):
+        etags = {
+            url: self.reader_client.get(url)['ETag']
+            for url in (PROFILE, GROUP_SLUG_URL, self.post_url)
+        }
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='NEW_COMMENT')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,50 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import get_thumbnail
+
+from . import caching, images
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Размеры должны совпадать с тегами {% thumbnail %} в шаблонах,
+# иначе заготовленные миниатюры не попадут в ключи sorl.
+SIZES = settings.POST_THUMBNAILS
+executor = ThreadPoolExecutor(
+    max_workers=settings.THUMBNAIL_WORKERS,
+    thread_name_prefix='thumbnails')
+
+
+def generate(name):
+    for geometry, options in SIZES:
+        get_thumbnail(name, geometry, **options)
+    images.write_variants(name)
+    # Только пока у поста та же картинка: её могли заменить, пока
+    # готовились копии прежней.
+    Post.objects.filter(image=name).update(image_variants=True)
+
+
+def generate_in_background(name, scopes):
+    try:
+        generate(name)
+        # Закэшированные страницы поста пока без WebP-копий.
+        caching.bump(*scopes)
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюры для %s', name)
+    finally:
+        # Соединение с базой у потока своё, хранилище sorl его открыло.
+        connection.close()
+
+
+def schedule(post):
+    """Готовит миниатюры поста в фоне после фиксации транзакции,
+    чтобы первому читателю ленты не пришлось ждать ресайза."""
+    if not post.image:
+        return
+    name = post.image.name
+    scopes = caching.post_scopes(post.id, post.author_id, post.group_id)
+    transaction.on_commit(
+        lambda: executor.submit(generate_in_background, name, scopes))
@@ -0,0 +1,186 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Follow, Post, Profile, TimelineEntry
+from .paginator import CursorPaginator, keyset_slice
+
+logger = logging.getLogger(__name__)
+
+FANOUT_LIMIT = settings.TIMELINE_FANOUT_LIMIT
+FANOUT_RESUME_LIMIT = settings.TIMELINE_FANOUT_RESUME_LIMIT
+BACKFILL_LIMIT = settings.TIMELINE_BACKFILL_LIMIT
+CELEBRITIES_TTL = settings.TIMELINE_CELEBRITIES_TTL
+CELEBRITIES_KEY = 'timeline:celebrities'
+BATCH_SIZE = 1000
+ENTRY_FIELDS = ('pub_date', 'post_id')
+# Один поток: догонки лент не спорят между собой за запись в SQLite.
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='timeline')
+
+
+def celebrities():
+    """id авторов, чьи посты не рассылаются по лентам подписчиков."""
+    authors = cache.get(CELEBRITIES_KEY)
+    if authors is None:
+        authors = frozenset(Profile.objects.filter(
+            celebrity=True).values_list('user_id', flat=True))
+        cache.set(CELEBRITIES_KEY, authors, CELEBRITIES_TTL)
+    return authors
+
+
+def followed_celebrities(user):
+    authors = celebrities()
+    if not authors:
+        return []
+    return list(Follow.objects.filter(
+        user=user, author__in=authors).values_list('author', flat=True))
+
+
+def batches(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def deliver(author_id, posts):
+    """Вставляет посты автора, пары (id, pub_date), в ленты всех его
+    подписчиков пачками по BATCH_SIZE."""
+    users = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    entries = (
+        TimelineEntry(user_id=user_id, post_id=post_id,
+                      author_id=author_id, pub_date=pub_date)
+        for user_id in users.iterator(chunk_size=BATCH_SIZE)
+        for post_id, pub_date in posts
+    )
+    for batch in batches(entries):
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post):
+    fan_out_many([(post.id, post.author_id, post.pub_date)])
+
+
+def fan_out_many(posts):
+    """Рассылает посты (id, author_id, pub_date) по лентам; подписчики
+    каждого автора читаются один раз на всю пачку."""
+    by_author = defaultdict(list)
+    for post_id, author_id, pub_date in posts:
+        by_author[author_id].append((post_id, pub_date))
+    authors = celebrities()
+    for author_id, author_posts in by_author.items():
+        if author_id not in authors:
+            deliver(author_id, author_posts)
+
+
+def backfill(user_id, author_id):
+    if author_id in celebrities():
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date').values_list('id', 'pub_date')[:BACKFILL_LIMIT]
+    TimelineEntry.objects.bulk_create([
+        TimelineEntry(user_id=user_id, post_id=post_id,
+                      author_id=author_id, pub_date=pub_date)
+        for post_id, pub_date in posts
+    ], ignore_conflicts=True)
+
+
+def forget_celebrities():
+    cache.delete(CELEBRITIES_KEY)
+
+
+def switch_fanout(author_id):
+    """Переключает автора между рассылкой постов и подмешиванием.
+
+    Популярным автор становится, когда подписчиков больше FANOUT_LIMIT,
+    а перестаёт, только когда их не больше FANOUT_RESUME_LIMIT: иначе
+    у границы каждая подписка и отписка гоняли бы догонку лент.
+    Догонка идёт в фоне после фиксации транзакции, а не в запросе.
+    """
+    profiles = Profile.objects.filter(user_id=author_id)
+    if profiles.filter(
+        celebrity=False, followers_count__gt=FANOUT_LIMIT,
+    ).update(celebrity=True, celebrity_since=timezone.now()):
+        transaction.on_commit(forget_celebrities)
+    elif profiles.filter(
+        celebrity=True, followers_count__lte=FANOUT_RESUME_LIMIT,
+    ).exists():
+        transaction.on_commit(
+            lambda: executor.submit(catch_up_in_background, author_id))
+
+
+def catch_up(author_id):
+    """Возобновляет рассылку постов автора, выпавшего из популярных.
+
+    Пока автор был популярным, его посты подмешивались при чтении, и
+    в ленты подписчиков попадают только они: с celebrity_since и не
+    больше BACKFILL_LIMIT последних. Пачки вставляются в отдельных
+    транзакциях, чтобы не держать запись в SQLite.
+    """
+    profile = Profile.objects.filter(
+        user_id=author_id, celebrity=True).first()
+    if profile is None or profile.followers_count > FANOUT_RESUME_LIMIT:
+        return
+    # Флаг снимается условно: из двух догонок одного автора пройдёт одна.
+    if not Profile.objects.filter(pk=profile.pk, celebrity=True).update(
+            celebrity=False, celebrity_since=None):
+        return
+    # Новые посты с этого момента рассылаются сами.
+    forget_celebrities()
+    posts = Post.objects.filter(author_id=author_id)
+    if profile.celebrity_since is not None:
+        posts = posts.filter(pub_date__gte=profile.celebrity_since)
+    posts = list(posts.order_by('-pub_date').values_list(
+        'id', 'pub_date')[:BACKFILL_LIMIT])
+    if posts:
+        deliver(author_id, posts)
+
+
+def catch_up_in_background(author_id):
+    try:
+        catch_up(author_id)
+    except Exception:
+        logger.exception('Не удалось догнать ленты автора %s', author_id)
+    finally:
+        connection.close()
+
+
+def purge(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок: материализованные записи плюс посты популярных
+    авторов, выбранные при чтении (fan-out on read).
+
+    Оба источника отдают не больше limit строк по одному и тому же
+    ключу (pub_date, id), после чего сливаются в общий порядок.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(
+            Post.objects.select_related('author', 'group'), per_page)
+        self.user = user
+
+    def fetch(self, key, reverse, limit):
+        entries = TimelineEntry.objects.filter(
+            user=self.user).select_related('post__author', 'post__group')
+        posts = [entry.post for entry in keyset_slice(
+            entries, ENTRY_FIELDS, key, reverse, limit)]
+        authors = followed_celebrities(self.user)
+        if authors:
+            posts += keyset_slice(
+                self.object_list.filter(author__in=authors), self.fields,
+                key, reverse, limit)
+        unique = {post.id: post for post in posts}.values()
+        return sorted(
+            unique, key=lambda post: (post.pub_date, post.id),
+            reverse=not reverse)[:limit]
@@ -15,14 +15,18 @@ urlpatterns = [
          views.profile_unfollow, name='profile_unfollow'),
 
     path('new/', views.new_post, name='new_post'),
+    path('search/', views.search_posts, name='search'),
     path('group/', views.index, name='group'),
     path('group/<slug:slug>/', views.group_posts, name='group_slug'),
     path('', views.index, name='index'),
     path('<str:username>/', views.profile, name='profile'),
+    path('<str:username>/export/', views.export_posts, name='export'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path('<str:username>/<int:post_id>/edit/',
          views.post_edit, name='post_edit'),
 
     path('<str:username>/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
+    path('<str:username>/<int:post_id>/comments/',
+         views.post_comments, name='post_comments'),
 ]
@@ -1,12 +1,67 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import patch_cache_control
 
+from . import caching, conditional, export, search, thumbnails
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
+from .paginator import CursorPaginator
+from .timeline import TimelinePaginator
 
 PER_PAGE = settings.PER_PAGE
+COMMENTS_PER_PAGE = settings.COMMENTS_PER_PAGE
+COMMENT_FIELDS = ('created', 'id')
+EXPORT_FORMATS = {
+    'jsonl': (export.as_jsonl, 'application/x-ndjson; charset=utf-8'),
+    'csv': (export.as_csv, 'text/csv; charset=utf-8'),
+}
+
+
+def paginate(request, queryset, cursor_paginator=None):
+    # Старые ссылки вида ?page=N обслуживаем прежним пагинатором,
+    # пока они не исчезнут из закладок и поисковиков.
+    if 'page' in request.GET:
+        return Paginator(queryset, PER_PAGE).get_page(request.GET['page'])
+    if cursor_paginator is None:
+        cursor_paginator = CursorPaginator(queryset, PER_PAGE)
+    return cursor_paginator.get_page(
+        after=request.GET.get('after'), before=request.GET.get('before'))
+
+
+def render_cached(request, template_name, context, *scopes):
+    """render() для страниц, кэшируемых по поколениям областей.
+
+    Версии областей читаются до рендера и попадают и в ключи фрагментов,
+    и в метки ответа для кэша страниц анонимов. Посты страницы тоже
+    становятся метками ответа.
+
+    Из тех же версий, читателя и его CSRF-куки складывается ETag: если
+    браузер прислал его в If-None-Match, шаблон не рендерится вовсе.
+    """
+    versions = caching.versions(*scopes)
+    context['cache_version'] = '.'.join(map(str, versions))
+    etag = conditional.make_etag(
+        request, versions, request.user.pk, request.META.get('CSRF_COOKIE'))
+
+    def build():
+        response = render(request, template_name, context)
+        tags = dict(zip(scopes, versions))
+        posts = context.get('page', ())
+        post_scopes = [caching.post_scope(post.id) for post in posts]
+        tags.update(zip(post_scopes, caching.versions(*post_scopes)))
+        response.cache_tags = tags
+        return response
+
+    response = conditional.respond(request, etag, build)
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True)
+    patch_cache_control(response, no_cache=True)
+    return response
 
 
 def page_not_found(request, exception=None):
@@ -23,37 +78,29 @@ def server_error(request):
 
 
 def index(request):
-    post_list = Post.objects.select_related('group')
-    paginator = Paginator(post_list, PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(
-        request,
-        'index.html',
-        {'page': page, 'posts': post_list, 'paginator': paginator}
-    )
+    post_list = Post.objects.select_related('author', 'group')
+    page = paginate(request, post_list)
+    return render_cached(
+        request, 'index.html', {'page': page}, caching.INDEX)
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = group.posts.select_related('author', 'group')
+    page = paginate(request, posts)
     context = {
         'group': group,
         'page': page,
-        'paginator': paginator
     }
-    return render(request, 'group.html', context)
+    return render_cached(
+        request, 'group.html', context, caching.group_scope(group.id))
 
 
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    posts = user.posts.all()
-    paginator = Paginator(posts, PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    user = get_object_or_404(
+        User.objects.select_related('profile'), username=username)
+    posts = user.posts.select_related('author', 'group')
+    page = paginate(request, posts)
     following = (
         request.user.is_authenticated and
         request.user != user and
@@ -63,16 +110,18 @@ def profile(request, username):
     context = {
         'author': user,
         'page': page,
-        'paginator': paginator,
         'following': following,
     }
-    return render(request, 'profile.html', context)
+    return render_cached(
+        request, 'profile.html', context, caching.author_scope(user.id))
 
 
 def post_view(request, username, post_id):
-    user = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile', 'group'),
+        id=post_id, author__username=username)
+    user = post.author
+    comments = comments_page(request, post)
     form = CommentForm(request.POST or None)
     following = (
         request.user.is_authenticated and
@@ -87,7 +136,73 @@ def post_view(request, username, post_id):
         'form': form,
         'following': following,
     }
-    return render(request, 'post.html', context)
+    return render_cached(
+        request, 'post.html', context,
+        caching.post_scope(post.id), caching.author_scope(user.id))
+
+
+def comments_page(request, post):
+    """Комментарии поста от новых к старым, курсор — в ?after."""
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        COMMENTS_PER_PAGE, COMMENT_FIELDS)
+    return paginator.get_page(after=request.GET.get('after'))
+
+
+def post_comments(request, username, post_id):
+    """Более ранние комментарии поста HTML-фрагментом для подгрузки."""
+    post = get_object_or_404(
+        Post.objects.select_related('author'),
+        id=post_id, author__username=username)
+    context = {
+        'post': post,
+        'comments': comments_page(request, post),
+    }
+    return render_cached(
+        request, 'includes/comment_list.html', context,
+        caching.post_scope(post.id))
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    group = author = None
+    if request.GET.get('group'):
+        group = get_object_or_404(Group, slug=request.GET['group'])
+    if request.GET.get('author'):
+        author = get_object_or_404(User, username=request.GET['author'])
+    ids = []
+    if query:
+        ids = search.ranked_ids(
+            query, group and group.id, author and author.id)
+    page = Paginator(ids, PER_PAGE).get_page(request.GET.get('page'))
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        page.object_list)
+    page.object_list = [posts[pk] for pk in page.object_list if pk in posts]
+    params = request.GET.copy()
+    params.pop('page', None)
+    context = {
+        'page': page,
+        'query': query,
+        'group': group,
+        'author': author,
+        'extra_query': params.urlencode(),
+    }
+    return render(request, 'search.html', context)
+
+
+@login_required
+def export_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        raise PermissionDenied
+    data_format = request.GET.get('format', 'jsonl')
+    if data_format not in EXPORT_FORMATS:
+        raise Http404
+    rows, content_type = EXPORT_FORMATS[data_format]
+    response = StreamingHttpResponse(rows(author), content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{username}.{data_format}"')
+    return response
 
 
 @login_required
@@ -98,6 +213,7 @@ def new_post(request):
     post = form.save(commit=False)
     post.author = request.user
     form.save()
+    thumbnails.schedule(post)
     return redirect('index')
 
 
@@ -110,6 +226,8 @@ def post_edit(request, username, post_id):
         request.POST or None, files=request.FILES or None, instance=post)
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect('post', username, post_id)
     return render(
         request, 'post_edit.html',
@@ -135,13 +253,12 @@ def add_comment(request, username, post_id):
 @login_required
 def follow_index(request):
     posts = Post.objects.filter(
-        author__following__user=request.user)
-    paginator = Paginator(posts, PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+        author__following__user=request.user).select_related(
+        'author', 'group')
+    page = paginate(
+        request, posts, TimelinePaginator(request.user, PER_PAGE))
     context = {
         'page': page,
-        'paginator': paginator,
     }
     return render(request, "follow.html", context)
 
@@ -150,13 +267,15 @@ def follow_index(request):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        with transaction.atomic():
+            Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    get_object_or_404(
-        Follow, user=request.user,
-        author__username=username).delete()
+    with transaction.atomic():
+        get_object_or_404(
+            Follow, user=request.user,
+            author__username=username).delete()
     return redirect('profile', username)
@@ -1,8 +1,16 @@
 import datetime as dt
 
+from django.conf import settings
+
 
 def year(request):
     this_year = dt.datetime.now().year
     return {
         "year": this_year
     }
+
+
+def fragment_cache(request):
+    return {
+        "fragment_cache_timeout": settings.FRAGMENT_CACHE_TIMEOUT
+    }
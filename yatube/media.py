@@ -0,0 +1,128 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def file_etag(stat):
+    # Загруженные файлы не переписываются на месте, так что время
+    # изменения и размер однозначно определяют содержимое.
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """(начало, конец) одного диапазона, None — отдать файл целиком,
+    False — диапазон не пересекается с файлом."""
+    match = RANGE_RE.match(header or '')
+    if not match or size == 0:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        return False
+    return start, end
+
+
+def if_range_matches(request, etag, mtime):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def iter_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def offload(path, fullpath):
+    """Ответ, по которому файл отдаст фронтовой сервер, а не Django."""
+    response = HttpResponse()
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + path
+    else:
+        response['X-Sendfile'] = fullpath
+    # Тип выставит сервер по расширению файла.
+    del response['Content-Type']
+    return response
+
+
+@require_safe
+def serve(request, path):
+    """Раздача MEDIA_ROOT с сильными ETag, 304 и Range.
+
+    С MEDIA_ACCEL сам файл передаёт nginx (X-Accel-Redirect) или
+    Apache/lighttpd (X-Sendfile), воркер Django проверяет только
+    условные заголовки.
+    """
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Файл не найден')
+    if not os.path.isfile(fullpath):
+        raise Http404('Файл не найден')
+    etag = file_etag(stat)
+    mtime = stat.st_mtime
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(mtime))
+    if response is None:
+        response = build_response(request, path, fullpath, stat, etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    patch_cache_control(
+        response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
+
+
+def build_response(request, path, fullpath, stat, etag):
+    if settings.MEDIA_ACCEL:
+        return offload(path, fullpath)
+    size = stat.st_size
+    content_type = (
+        mimetypes.guess_type(fullpath)[0] or 'application/octet-stream')
+    byte_range = None
+    if if_range_matches(request, etag, stat.st_mtime):
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        response = FileResponse(
+            open(fullpath, 'rb'), content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_range(fullpath, start, end - start + 1),
+            status=206, content_type=content_type)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -2,11 +2,74 @@ import os
 
 # Paginator settings for pages views
 PER_PAGE = 10
+# Комментариев на странице поста и в одной подгрузке более ранних
+COMMENTS_PER_PAGE = 50
+
+# Лента подписок: авторы с числом подписчиков больше лимита не рассылают
+# посты по лентам, их посты подмешиваются при чтении. Рассылка
+# возобновляется, только когда подписчиков не больше второго порога,
+# чтобы автор у границы не переключался туда и обратно
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_FANOUT_RESUME_LIMIT = 800
+# Сколько последних постов автора попадает в ленту при подписке
+TIMELINE_BACKFILL_LIMIT = 1000
+# Как долго кэшируется список популярных авторов, в секундах
+TIMELINE_CELEBRITIES_TTL = 300
+
+# Время жизни фрагментов лент в кэше, в секундах. Устаревшие фрагменты
+# отсекаются счётчиками поколений, так что TTL лишь ограничивает память
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+# То же для целых страниц анонимных читателей
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Сколько самых релевантных постов отдаёт поиск
+SEARCH_LIMIT = 1000
+
+# Строк в одном запросе при выгрузке постов и комментариев автора
+EXPORT_CHUNK_SIZE = 2000
+
+# Миниатюры картинок постов, которые готовятся сразу после загрузки:
+# (геометрия, опции) как в тегах {% thumbnail %} шаблонов
+POST_THUMBNAILS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+# Потоков на процесс для фоновой подготовки миниатюр
+THUMBNAIL_WORKERS = 2
+
+# Загрузка картинок: больше IMAGE_MAX_PIXELS отклоняем, длинную сторону
+# уменьшаем до IMAGE_MAX_SIDE
+IMAGE_MAX_PIXELS = 50_000_000
+IMAGE_MAX_SIDE = 2560
+# WebP-копии для карточки поста, (ширина, высота)
+POST_IMAGE_VARIANTS = [(480, 170), (960, 339)]
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
+# Запросы дольше порога, в миллисекундах, пишутся в журнал строками JSON
+# вместе с самыми долгими SQL-запросами; пустой путь отключает журнал
+SLOW_REQUEST_MS = 500
+SLOW_REQUEST_LOG = os.environ.get(
+    'SLOW_REQUEST_LOG', os.path.join(BASE_DIR, 'logs', 'slow_requests.jsonl'))
+# Статистический профилировщик: доля профилируемых запросов (0 — только
+# с подписанным заголовком X-Profile), период снятия стеков в секундах,
+# каталог для стеков и срок жизни токена из profile_token
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_INTERVAL = 0.005
+PROFILE_DIR = os.path.join(BASE_DIR, 'logs', 'profiles')
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+# Метрики Prometheus: каталог для снимков воркеров (очищается при старте
+# gunicorn), как часто воркер обновляет свой снимок, в секундах, и адреса,
+# которым отдаётся /metrics/
+METRICS_DIR = os.environ.get(
+    'METRICS_DIR', os.path.join(BASE_DIR, 'logs', 'metrics'))
+METRICS_FLUSH_INTERVAL = 1
+METRICS_ALLOWED_IPS = os.environ.get(
+    'METRICS_ALLOWED_IPS', '127.0.0.1').split(',')
+# sorl-thumbnail с замером времени для Server-Timing
+THUMBNAIL_BACKEND = 'monitoring.backends.TimedThumbnailBackend'
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
 
@@ -34,7 +97,8 @@ LOGOUT_REDIRECT_URL = "index"
 INSTALLED_APPS = [
     'about',
     'users',
-    'posts',
+    'monitoring',
+    'posts.apps.PostsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -45,12 +109,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.ServerTimingMiddleware',
+    'monitoring.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'posts.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # "debug_toolbar.middleware.DebugToolbarMiddleware",
@@ -60,12 +127,20 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'monitoring.backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Шаблоны компилируются один раз на процесс, а не на каждый
+            # рендер и каждый {% include %} карточки поста
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'yatube.context_processors.year',
+                'yatube.context_processors.fragment_cache',
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -84,10 +159,27 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.environ.get(
+            'DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        # Соединение живёт между запросами, а не открывается заново
+        # (и не перечитывает схему) на каждый запрос
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+# Прагмы для каждого соединения с SQLite. В режиме WAL читатели не ждут
+# писателя; synchronous=NORMAL в WAL не теряет целостность, лишь
+# последние транзакции при отключении питания; busy_timeout — сколько
+# миллисекунд ждать блокировку вместо мгновенного «database is locked»
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,  # в КиБ, то есть 64 МиБ на соединение
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -125,13 +217,42 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 STATIC_URL = '/static/'
-STATIC_ROOT = os.path.join(BASE_DIR, "static")
+# Исходники статики; collectstatic складывает в STATIC_ROOT их копии
+# с хешем содержимого в имени и сжатые .gz/.br рядом. WhiteNoise отдаёт
+# такие копии с Cache-Control: immutable на 10 лет. Каталога static/
+# в репозитории может не быть: тогда собирается только статика приложений
+STATIC_SOURCE_DIR = os.path.join(BASE_DIR, 'static')
+STATICFILES_DIRS = (
+    [STATIC_SOURCE_DIR] if os.path.isdir(STATIC_SOURCE_DIR) else [])
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'yatube.storage.StaticFilesStorage'
+# Копии без хеша остаются для ссылок из CSS, которые не удалось переписать
+WHITENOISE_KEEP_ONLY_HASHED_FILES = False
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Кто передаёт байты медиафайлов: None — сам Django, 'x-accel-redirect' —
+# nginx через internal-location MEDIA_ACCEL_PREFIX, 'x-sendfile' —
+# Apache (mod_xsendfile) или lighttpd
+MEDIA_ACCEL = os.environ.get('MEDIA_ACCEL') or None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+# Сколько браузеру можно не перепроверять медиафайл, в секундах
+MEDIA_MAX_AGE = 60 * 60 * 24
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Адреса memcached через запятую, например 127.0.0.1:11211. Без них кэш
+# живёт в памяти процесса: у каждого воркера gunicorn свой, и сброс
+# поколений в одном не виден остальным, поэтому воркер тогда один
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
+if MEMCACHED_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'monitoring.cache.MemcachedCache',
+            'LOCATION': MEMCACHED_LOCATION.split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'monitoring.cache.LocMemCache',
+        }
     }
-}
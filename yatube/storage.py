@@ -0,0 +1,17 @@
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Хешированные имена и готовые .gz/.br копии статики.
+
+    Пока collectstatic не запускался (тесты, свежий checkout), файла
+    нет ни в манифесте, ни в STATIC_ROOT — тогда шаблоны получают
+    исходное имя, а не ValueError при рендеринге.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
@@ -4,7 +4,8 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import include, path, re_path
-from django.views.static import serve
+
+from . import media
 
 handler404 = "posts.views.page_not_found"  # noqa
 handler500 = "posts.views.server_error"  # noqa 
@@ -15,17 +16,16 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('admin/', admin.site.urls),
+    path('api/v1/', include('posts.api_urls', namespace='api')),
+    path('metrics/', include('monitoring.urls', namespace='monitoring')),
     path('', include('posts.urls')),
 ]
 
 if settings.DEBUG:
     import debug_toolbar  # noqa
     urlpatterns += (path("__debug__/", include(debug_toolbar.urls)),)
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(
         settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
 urlpatterns += staticfiles_urlpatterns()
-urlpatterns += [re_path(r'^media/(?P<path>.*)$', serve, {
-    'document_root': settings.MEDIA_ROOT, }), ]
+urlpatterns += [re_path(r'^media/(?P<path>.*)$', media.serve), ]